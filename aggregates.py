@@ -0,0 +1,297 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+import datastore
+import sketches
+
+
+# Tables de comptages distincts, calculées une fois par version de jeu de données
+# {source: (version, {(dim, cible): (par_cle, par_valeur_decroissante)})}
+_cube = {}
+_lock = threading.Lock()
+
+# Tables publiées pour les sources résumées par blocs (streaming), qui survivent à clear()
+# {source: (version, {clé: table})}
+_installed = {}
+
+# Code d'une paire d'identifiants positifs (clé, valeur) : clé * _PAIR_SPAN + valeur
+_PAIR_SPAN = 1 << 32
+
+
+def _tables(name):
+    """Tables de la source `name` pour sa version courante (les versions périmées sont oubliées)"""
+    version = datastore.dataset_version(name)
+    entry = _cube.get(name)
+    if entry is None or entry[0] != version:
+        installed = _installed.get(name)
+        entry = (version, dict(installed[1]) if installed and installed[0] == version else {})
+        _cube[name] = entry
+    return entry[1]
+
+
+def _distinct(dim, target, name):
+    tables = _tables(name)
+    key = (dim, target)
+    result = tables.get(key)
+    if result is None:
+        with _lock:
+            result = tables.get(key)
+            if result is None:
+                df = datastore.get_dataset(name)
+                by_key = df.groupby(dim)[target].nunique()
+                # Tri stable : à égalité on garde l'ordre des clés, comme nlargest
+                by_value = by_key.sort_values(ascending=False, kind='stable')
+                result = (by_key, by_value)
+                tables[key] = result
+    return result
+
+
+def distinct_counts(dim, target, name='pdv'):
+    """Nombre de `target` distincts par valeur de `dim`, indexé par `dim` trié"""
+    return _distinct(dim, target, name)[0]
+
+
+def top_distinct_counts(dim, target, n, name='pdv'):
+    """Les `n` valeurs de `dim` ayant le plus de `target` distincts (équivalent à nlargest)"""
+    return _distinct(dim, target, name)[1].iloc[:n]
+
+
+def row_counts(dim, name='pdv'):
+    """Nombre de lignes par valeur de `dim`, par ordre décroissant (équivalent à value_counts)"""
+    tables = _tables(name)
+    key = (dim, None)
+    result = tables.get(key)
+    if result is None:
+        with _lock:
+            result = tables.get(key)
+            if result is None:
+                result = datastore.get_dataset(name)[dim].value_counts()
+                tables[key] = result
+    return result
+
+
+def sketch(dim, target, name='pdv', precision=sketches.DEFAULT_PRECISION):
+    """Sketches HyperLogLog des `target` distincts par (valeur de `dim`, jour)"""
+    tables = _tables(name)
+    key = ("sketch", dim, target, precision)
+    result = tables.get(key)
+    if result is None:
+        with _lock:
+            result = tables.get(key)
+            if result is None:
+                df = datastore.get_dataset(name)
+                result = sketches.DistinctSketches(precision)
+                result.add(df[dim].to_numpy(), df['dateID'].to_numpy(), df[target].to_numpy())
+                tables[key] = result
+    return result
+
+
+def approx_distinct_counts(dim, target, name='pdv', start_id=None, end_id=None):
+    """Estimation de `distinct_counts` par fusion des sketches, éventuellement sur une plage de dates"""
+    tables = _tables(name)
+    key = ("approx", dim, target, start_id, end_id)
+    result = tables.get(key)
+    if result is None:
+        result = sketch(dim, target, name).estimate(start_id, end_id).round().astype('int64')
+        tables[key] = result
+    return result
+
+
+def approx_top_distinct_counts(dim, target, n, name='pdv', start_id=None, end_id=None):
+    """Estimation de `top_distinct_counts` (tri stable, comme nlargest)"""
+    counts = approx_distinct_counts(dim, target, name, start_id, end_id)
+    return counts.sort_values(ascending=False, kind='stable').iloc[:n]
+
+
+def _sorted_unique(codes):
+    """Codes triés sans doublon ; tri puis comparaison des voisins, bien plus rapide que np.unique (hachage) ici"""
+    codes = np.sort(codes)
+    if len(codes) == 0:
+        return codes
+    return codes[np.r_[True, codes[1:] != codes[:-1]]]
+
+
+def pair_codes(keys, values):
+    """Codes triés et sans doublon des paires (clé, valeur) alignées"""
+    return _sorted_unique(np.asarray(keys, dtype=np.int64) * _PAIR_SPAN + np.asarray(values, dtype=np.int64))
+
+
+def union_codes(codes, *others):
+    """Union de tableaux de codes triés sans doublon, en un seul tri"""
+    return _sorted_unique(np.concatenate([codes, *others]))
+
+
+def counts_from_pairs(codes, dim, target):
+    """Nombre de valeurs distinctes par clé à partir des codes de paires, comme groupby().nunique()"""
+    keys, counts = np.unique(codes // _PAIR_SPAN, return_counts=True)
+    return pd.Series(counts, index=pd.Index(keys, name=dim), name=target)
+
+
+def day_pairs(target, name='pdv'):
+    """Paires (dateID, `target`) distinctes, codées par `pair_codes` et donc triées par jour"""
+    tables = _tables(name)
+    key = ("day_pairs", target)
+    result = tables.get(key)
+    if result is None:
+        with _lock:
+            result = tables.get(key)
+            if result is None:
+                df = datastore.get_dataset(name)
+                result = pair_codes(df['dateID'].to_numpy(), df[target].to_numpy())
+                tables[key] = result
+    return result
+
+
+def period_distinct_counts(target, start_id, end_id, granularite="M", name='pdv'):
+    """`target` distincts par jour ("D") ou par mois ("M") entre deux dateID inclus
+
+    Les mois sont indexés par le dateID de leur premier jour. Le calcul ne relit que les paires
+    (jour, valeur) de la plage, trouvées par dichotomie.
+    """
+    codes = day_pairs(target, name)
+    lo, hi = np.searchsorted(codes, [start_id * _PAIR_SPAN, (end_id + 1) * _PAIR_SPAN])
+    codes = codes[lo:hi]
+    if granularite == "M":
+        days = codes // _PAIR_SPAN
+        codes = _sorted_unique((days // 100 * 100 + 1) * _PAIR_SPAN + codes % _PAIR_SPAN)
+    return counts_from_pairs(codes, 'dateID', target)
+
+
+def _group_code(values):
+    """Code d'un groupe d'une ou deux dimensions (identifiants positifs) ; accepte des tableaux alignés"""
+    code = np.int64(0)
+    for value in values:
+        code = code * _PAIR_SPAN + np.asarray(value, dtype=np.int64)
+    return code
+
+
+class FirstSeen:
+    """Première date de chaque produit au sein de chaque groupe, triée par (groupe, date)"""
+
+    def __init__(self, groups, prods, dates):
+        # Une ligne par (groupe, produit), celle de sa plus petite date
+        order = np.lexsort((dates, prods, groups))
+        groups, prods, dates = groups[order], prods[order], dates[order]
+        first = np.r_[True, (groups[1:] != groups[:-1]) | (prods[1:] != prods[:-1])] if len(groups) else []
+        groups, prods, dates = groups[first], prods[first], dates[first]
+
+        order = np.lexsort((dates, groups))
+        self.groups, self.prods, self.dates = groups[order], prods[order], dates[order]
+
+    @property
+    def nbytes(self):
+        return self.groups.nbytes + self.prods.nbytes + self.dates.nbytes
+
+    def added(self, groups, prods, dates):
+        """Nouvelle table tenant compte de lignes ajoutées (seule la table est retriée, pas la source)"""
+        return FirstSeen(
+            np.concatenate([self.groups, groups]),
+            np.concatenate([self.prods, prods]),
+            np.concatenate([self.dates, dates]),
+        )
+
+    def dates_of(self, group):
+        """Premières dates triées des produits du groupe"""
+        lo = np.searchsorted(self.groups, group, side='left')
+        hi = np.searchsorted(self.groups, group, side='right')
+        return self.dates[lo:hi]
+
+
+def _first_seen_rows(df, dims):
+    return (
+        _group_code(df[dim].to_numpy() for dim in dims),
+        df['prodID'].to_numpy().astype(np.int64),
+        df['dateID'].to_numpy().astype(np.int64),
+    )
+
+
+def first_seen(dims, name='produits'):
+    """Table des premières dates des produits par groupe de `dims` (une ou deux dimensions)"""
+    tables = _tables(name)
+    key = ("first_seen", tuple(dims))
+    result = tables.get(key)
+    if result is None:
+        with _lock:
+            result = tables.get(key)
+            if result is None:
+                result = FirstSeen(*_first_seen_rows(datastore.get_dataset(name), dims))
+                tables[key] = result
+    return result
+
+
+def new_product_counts(filters, start_id, end_id, granularite="M", name='produits'):
+    """Produits apparus pour la première fois par période entre deux dateID inclus
+
+    `filters` ({dim: valeur}, une ou deux dimensions) désigne le groupe ; un produit vu dans le
+    groupe avant `start_id` n'est pas nouveau. Les périodes ("M", "W" ou "D") sont indexées par
+    le dateID de leur premier jour.
+    """
+    dates = first_seen(tuple(filters), name).dates_of(_group_code(filters.values()))
+    lo = np.searchsorted(dates, start_id, side='left')
+    hi = np.searchsorted(dates, end_id, side='right')
+    periods = datastore.period_start_ids(dates[lo:hi], granularite)
+    if len(periods) == 0:
+        return pd.Series(dtype='int64')
+    # Dates triées, donc périodes triées : chaque période est une plage contiguë
+    starts = np.flatnonzero(np.r_[True, periods[1:] != periods[:-1]])
+    return pd.Series(np.diff(np.r_[starts, len(periods)]), index=periods[starts])
+
+
+def install(name, version, tables):
+    """Remplace les tables de `name` par des tables déjà calculées pour `version` (source résumée par blocs)"""
+    with _lock:
+        _installed[name] = (version, tables)
+        _cube[name] = (version, dict(tables))
+
+
+def _updated_distinct(result, dim, target, name, rows):
+    """Tables (par clé, par valeur) après ajout de `rows` : seules les clés touchées sont recomptées"""
+    by_key, _ = result
+    touched = np.unique(rows[dim].to_numpy()).tolist()
+    recount = datastore.select(name, **{dim: touched}).groupby(dim)[target].nunique()
+    by_key = pd.concat([by_key.drop(recount.index, errors='ignore'), recount]).sort_index()
+    return by_key, by_key.sort_values(ascending=False, kind='stable')
+
+
+def apply_append(name, old_version, rows):
+    """Reporte les tables de `old_version` sur la version courante après l'ajout de `rows`
+
+    Les comptages distincts ne sont recalculés que pour les clés présentes dans l'extrait, les
+    comptages de lignes et les sketches sont complétés, et les estimations bornées avant les
+    nouvelles dates sont conservées. Les tables d'une autre version sont laissées telles quelles.
+    """
+    first_new_date = int(rows['dateID'].min())
+    with _lock:
+        entry = _cube.get(name)
+        if entry is None or entry[0] != old_version:
+            return
+        tables = {}
+        for key, result in entry[1].items():
+            if key[0] == "sketch":
+                _, dim, target, _ = key
+                result = result.copy()
+                result.add(rows[dim].to_numpy(), rows['dateID'].to_numpy(), rows[target].to_numpy())
+            elif key[0] == "day_pairs":
+                result = union_codes(result, pair_codes(rows['dateID'].to_numpy(), rows[key[1]].to_numpy()))
+            elif key[0] == "first_seen":
+                result = result.added(*_first_seen_rows(rows, key[1]))
+            elif key[0] == "approx":
+                end_id = key[4]
+                if end_id is None or end_id >= first_new_date:
+                    continue
+            elif key[1] is None:
+                dim = key[0]
+                result = result.add(rows[dim].value_counts(), fill_value=0).astype('int64')
+                result = result.sort_values(ascending=False, kind='stable')
+            else:
+                result = _updated_distinct(result, key[0], key[1], name, rows)
+            tables[key] = result
+        _cube[name] = (datastore.dataset_version(name), tables)
+
+
+def clear():
+    """Oublie toutes les tables matérialisées"""
+    with _lock:
+        _cube.clear()
@@ -1,62 +1,44 @@
-import inspect
-import textwrap
+import sys
 
 import streamlit as st
 
-from fullcollab_streamlit import FULLCOLLAB_DEMOS
-from emma_diag import BOARD_FABRICANTS_DEMOS
+import demo_registry
 
 
 st.set_page_config(page_title="Streamlit cours graphe")
 
 
-def load_demos(src):
-    """Retourne un dict {nom: fonction} depuis un module, un dict ou un objet."""
-    demos = {}
-
-    # Cas 1 : c’est un module ou un objet avec __dict__
-    if hasattr(src, "__dict__"):
-        items = vars(src).items()
-
-    # Cas 2 : c’est déjà un dict
-    elif isinstance(src, dict):
-        items = src.items()
-
-    else:
-        # Cas 3 : objet sans __dict__
-        items = ((name, getattr(src, name)) for name in dir(src))
-
-    # On garde uniquement les fonctions appelables
-    for name, obj in items:
-        if callable(obj) and not name.startswith("__"):
-            demos[name] = obj
-
-    return demos
-
-
 def main():
     st.title("Streamlit cours graphe")
 
-    # Chargement sécurisé toutes les démos
-    allDiag = {
-        **load_demos(FULLCOLLAB_DEMOS),
-        **load_demos(BOARD_FABRICANTS_DEMOS),
-    }
-
     with st.sidebar:
         st.header("Configuration")
         selected_page = st.selectbox(
             label="Choose an example",
-            options=list(allDiag.keys()),
+            options=list(demo_registry.DEMOS.keys()),
         )
 
-    demo = allDiag.get(selected_page)
+    # Le module de la démo n'est importé qu'à sa première sélection
+    demo = demo_registry.get_demo(selected_page)
 
     if demo:
         demo()
     else:
         st.error("La démo sélectionnée est introuvable.")
 
+    # Surveillance du dépôt d'extraits, une fois par processus et après le premier rendu ;
+    # entre processus, le verrou d'ingest.py n'en laisse qu'un ingérer
+    demo_registry.import_module("ingest").start_watcher()
+
+    with st.sidebar:
+        with st.expander("Cache des calculs"):
+            st.json({module: f"{seconds * 1000:.0f} ms" for module, seconds in demo_registry.import_times().items()})
+            # Les caches n'existent que si une démo les a déjà importés
+            if "result_cache" in sys.modules:
+                st.json(sys.modules["result_cache"].RESULT_CACHE.stats())
+            if "payloads" in sys.modules:
+                st.json(sys.modules["payloads"].payload_stats())
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,346 @@
+"""Banc d'essai sans interface de toutes les démos enregistrées
+
+Chaque rendu est exécuté avec des widgets Streamlit simulés, sur une grille fixe de valeurs,
+et un st_echarts qui mesure les options au lieu de les afficher. Pour chaque démo on relève
+le temps de calcul à froid (caches vidés) et à chaud (p50 / p95), le pic mémoire et la
+taille des options sérialisées, puis on compare à une référence enregistrée.
+
+    python bench_demos.py [--repeat N] [--only TEXTE] [--save-baseline] [--tolerance 0.2]
+
+Le code de retour vaut 1 quand une régression est détectée.
+"""
+import argparse
+import contextlib
+import datetime
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+import streamlit as st
+
+import aggregates
+import archive_app
+import demo_registry
+import payloads
+import result_cache
+from profile_startup import PROFILE_DIR, capture_charts
+
+
+BASELINE_PATH = os.path.join(PROFILE_DIR, "bench-baseline.json")
+
+# Écarts ignorés même au-delà de la tolérance relative (bruit de mesure)
+MIN_SECONDS_DELTA = 0.002
+MIN_BYTES_DELTA = 64 * 1024
+
+
+class Choice:
+    """Valeur de grille désignant la `index`-ième option du widget (indépendante des données)"""
+
+    def __init__(self, index):
+        self.index = index
+
+    def __repr__(self):
+        return f"Choice({self.index})"
+
+
+# Grilles de valeurs par démo : liste de {clé ou libellé du widget: valeur}.
+# Les widgets absents d'un point de grille prennent leur valeur par défaut ; la clé
+# "session_state" fournit l'état de session (zoom renvoyé par le composant, etc.).
+GRIDS = {
+    "Produits par Catégorie": [{}, {"approx_prod_cat": True}],
+    "Produits par Fabricant": [
+        {"Nombre de fabricants à afficher": n} for n in (5, 20, 50)
+    ] + [{"approx_prod_fab": True}],
+    "Magasins par Catégorie": [{}, {"approx_mag_cat": True}],
+    "Magasins par Fabricant": [
+        {"Nombre de fabricants à afficher": n} for n in (5, 20, 50)
+    ] + [{"approx_mag_fab": True}],
+    "Tendance Mensuelle": [
+        {},
+        {"Granularité": "D"},
+        {"Granularité": "D", "Échantillonnage": "minmax"},
+        {"Granularité": "D", "Échantillonnage": "none"},
+        {
+            "Granularité": "D",
+            "Zoom côté serveur (fenêtre visible seulement)": True,
+            "session_state": {"zoom_tendance": [90, 100]},
+        },
+        {"Granularité": "D", "approx_tendance": True},
+    ],
+    "Diagramme Sankey": [
+        {},
+        {"Sélectionner des magasins": [Choice(0), Choice(1), Choice(2)]},
+        {"Nombre de fournisseurs par catégorie": 20},
+    ],
+    "Flux Multi-niveaux": [
+        {},
+        {"Poids des liens": "rows"},
+        {"Niveaux du flux (dans l'ordre)": ["catID", "fabID", "prodID"], "Nombre maximal de nœuds": 500},
+    ],
+    "Top Magasins par Catégorie": [{"cat_top_mag": Choice(i)} for i in (0, 4)],
+    "Score Santé Fabricant": [{"cat_score": Choice(0)}, {"cat_score": Choice(4), "fab_score": Choice(1)}],
+    "Présence sur le Marché": [{"top_market": n} for n in (5, 20)],
+    "Disponibilité Magasins": [{}, {"magA": Choice(2), "magB": Choice(3), "fab_dumbbell": Choice(1)}],
+    "Ratio Accords/Produits": [{"cat_ratio": Choice(i)} for i in (0, 4)],
+    "Intensité Concurrentielle": [{"cat_hhi": Choice(i)} for i in (0, 4)],
+    "Croissance Catalogue": [
+        {},
+        {"gran_growth": "D"},
+        {"gran_growth": "W"},
+        {"scope_growth": "Par fabricant", "fab_growth": Choice(0)},
+        {"gran_growth": "D", "session_state": {"zoom_growth": [90, 100]}},
+    ],
+    "archive/Server-side datazoom": [{}, {"session_state": {"server_datazoom": [0, 100]}}],
+}
+
+
+def _pick(options, value):
+    options = list(options)
+    if isinstance(value, Choice):
+        return options[min(value.index, len(options) - 1)]
+    if isinstance(value, list):
+        return [_pick(options, v) for v in value]
+    return value
+
+
+class Widgets:
+    """Remplace les widgets de `st` par des fonctions qui lisent le point de grille courant"""
+
+    NAMES = ("selectbox", "radio", "multiselect", "slider", "date_input", "checkbox", "button")
+
+    def __init__(self):
+        self.point = {}
+
+    def _value(self, label, kwargs, default, options=None):
+        key = kwargs.get("key")
+        for name in (key, label):
+            if name is not None and name in self.point:
+                value = self.point[name]
+                return _pick(options, value) if options is not None else value
+        return default
+
+    def selectbox(self, label, options=(), index=0, **kwargs):
+        options = list(kwargs.pop("options", options))
+        return self._value(label, kwargs, options[index] if options else None, options)
+
+    radio = selectbox
+
+    def multiselect(self, label, options=(), default=None, **kwargs):
+        options = list(kwargs.pop("options", options))
+        return self._value(label, kwargs, list(default or []), options)
+
+    def slider(self, label, min_value=None, max_value=None, value=None, *args, **kwargs):
+        return self._value(label, kwargs, min_value if value is None else value)
+
+    def date_input(self, label, value=None, *args, **kwargs):
+        return self._value(label, kwargs, value)
+
+    def checkbox(self, label, value=False, *args, **kwargs):
+        return self._value(label, kwargs, value)
+
+    def button(self, label, *args, **kwargs):
+        return self._value(label, kwargs, False)
+
+    @contextlib.contextmanager
+    def installed(self):
+        saved = {name: getattr(st, name) for name in self.NAMES + ("session_state",)}
+        for name in self.NAMES:
+            setattr(st, name, getattr(self, name))
+        try:
+            yield self
+        finally:
+            for name, value in saved.items():
+                setattr(st, name, value)
+
+    def set_point(self, point):
+        self.point = point
+        st.session_state = dict(point.get("session_state", {}))
+
+
+def capture_pyecharts(module, sink):
+    """Remplace st_pyecharts dans `module` : les options du graphique sont mesurées"""
+    def st_pyecharts(chart, **kwargs):
+        sink.append(len(chart.dump_options()))
+
+    module.st_pyecharts = st_pyecharts
+
+
+def registered_demos():
+    """Toutes les démos : {nom: (module, fonction)}, les pages d'archive préfixées par archive/"""
+    demos = dict(demo_registry.DEMOS)
+    for name, func in archive_app.ST_PAGES.items():
+        demos[f"archive/{name}"] = ("archive_app", func.__name__)
+    for name, function_name in archive_app.PY_ST_PAGES.items():
+        demos[f"archive-py/{name}"] = ("archive_pyecharts", function_name)
+    return demos
+
+
+def clear_caches():
+    """Vide les caches de résultats et d'options ; les jeux de données restent chargés"""
+    result_cache.RESULT_CACHE.clear()
+    payloads.PAYLOAD_CACHE.clear()
+    aggregates.clear()
+
+
+def _percentile(values, q):
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[q - 1]
+
+
+def bench_demo(render, points, repeat, sizes, errors, shown_errors):
+    """Mesures d'une démo sur tous les points de sa grille
+
+    Un point en échec, par exception ou par un message `st.error`, est relevé dans `errors` et
+    n'est pas mesuré : une page qui n'affiche qu'une erreur n'entre pas dans la référence.
+    """
+    cold, warm, peaks, option_bytes = [], [], [], []
+    for point in points:
+        widgets.set_point(point)
+
+        # Passe mémoire séparée : tracemalloc ralentit trop l'exécution pour le chronométrage
+        clear_caches()
+        shown_errors.clear()
+        tracemalloc.start()
+        try:
+            render()
+        except Exception as e:
+            errors.append(f"{point}: {type(e).__name__}: {e}")
+            tracemalloc.stop()
+            continue
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        if shown_errors:
+            errors.append(f"{point}: {shown_errors[0]}")
+            continue
+        peaks.append(peak)
+
+        for run in range(repeat):
+            clear_caches()
+            sizes.clear()
+            start = time.perf_counter()
+            render()
+            cold.append(time.perf_counter() - start)
+            if run == 0:
+                # Options d'un seul rendu : le rendu à chaud les renvoie à l'identique
+                option_bytes.append(sum(sizes))
+
+            start = time.perf_counter()
+            render()
+            warm.append(time.perf_counter() - start)
+
+    if not cold:
+        return None
+    return {
+        "points": len(points),
+        "runs": len(cold),
+        "cold_p50": _percentile(cold, 50),
+        "cold_p95": _percentile(cold, 95),
+        "warm_p50": _percentile(warm, 50),
+        "warm_p95": _percentile(warm, 95),
+        "peak_bytes": max(peaks),
+        "option_bytes": max(option_bytes),
+    }
+
+
+def compare(results, baseline, tolerance):
+    """Régressions par rapport à la référence : [(démo, mesure, référence, actuel)]"""
+    regressions = []
+    checks = (
+        ("cold_p50", MIN_SECONDS_DELTA),
+        ("warm_p50", MIN_SECONDS_DELTA),
+        ("peak_bytes", MIN_BYTES_DELTA),
+        ("option_bytes", 0),
+    )
+    for name, result in results.items():
+        reference = baseline.get(name)
+        if not result or not reference:
+            continue
+        for metric, min_delta in checks:
+            before, after = reference[metric], result[metric]
+            if after > before * (1 + tolerance) and after - before > min_delta:
+                regressions.append((name, metric, before, after))
+    return regressions
+
+
+widgets = Widgets()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Banc d'essai des démos")
+    parser.add_argument("--repeat", type=int, default=5, help="exécutions par point de grille")
+    parser.add_argument("--only", help="ne mesure que les démos dont le nom contient ce texte")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true", help="enregistre ces mesures comme référence")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="hausse relative tolérée")
+    parser.add_argument("--json", help="écrit aussi les mesures dans ce fichier")
+    args = parser.parse_args(argv)
+
+    # Hors de `streamlit run`, Streamlit signale chaque appel sans contexte de session
+    logging.disable(logging.WARNING)
+
+    results, failures = {}, {}
+    sizes, shown_errors = [], []
+    with widgets.installed():
+        # Les erreurs affichées par les démos sont relevées dans le rapport
+        st.error = lambda message, **kwargs: shown_errors.append(str(message))
+        for name, (module_path, function_name) in registered_demos().items():
+            if args.only and args.only not in name:
+                continue
+            module = demo_registry.import_module(module_path)
+            capture_charts(module, sizes)
+            if hasattr(module, "st_pyecharts"):
+                capture_pyecharts(module, sizes)
+
+            errors = []
+            results[name] = bench_demo(
+                getattr(module, function_name), GRIDS.get(name, [{}]), args.repeat, sizes, errors, shown_errors
+            )
+            if errors:
+                failures[name] = errors[0]
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+    regressions = compare(results, baseline, args.tolerance)
+
+    print(f"{'démo':<42} {'froid p50':>10} {'p95':>8} {'chaud p50':>10} {'pic Mo':>8} {'options Ko':>11}")
+    for name, r in results.items():
+        if r is None:
+            print(f"{name:<42} échec : {failures.get(name)}")
+            continue
+        print(
+            f"{name:<42} {r['cold_p50'] * 1000:8.1f}ms {r['cold_p95'] * 1000:6.1f}ms "
+            f"{r['warm_p50'] * 1000:8.1f}ms {r['peak_bytes'] / 1e6:8.1f} {r['option_bytes'] / 1e3:11.1f}"
+        )
+    for name, message in failures.items():
+        if results.get(name) is not None:
+            print(f"avertissement {name} : {message}")
+
+    if baseline:
+        for name, metric, before, after in regressions:
+            print(f"RÉGRESSION {name} {metric} : {before:.4g} -> {after:.4g}")
+        if not regressions:
+            print(f"Aucune régression au-delà de {args.tolerance:.0%} par rapport à {args.baseline}")
+
+    report = {
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "repeat": args.repeat,
+        "results": results,
+        "failures": failures,
+    }
+    for path in filter(None, (args.json, args.baseline if args.save_baseline else None)):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
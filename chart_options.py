@@ -0,0 +1,268 @@
+import numpy as np
+from streamlit_echarts import JsCode
+
+
+# Événement dataZoom renvoyé à Python : [début, fin] en pourcentage de l'axe
+DATAZOOM_EVENT = """
+    function(params) {
+        var p = params.batch ? params.batch[0] : params;
+        return [p.start, p.end];
+    }
+"""
+
+
+def dataset_block(columns, ordinal=(), time=()):
+    """Bloc `dataset` ECharts en colonnes : {dimension: liste}, une conversion par colonne
+
+    Les dimensions de `ordinal` sont des libellés de catégorie, même quand elles sont numériques ;
+    celles de `time` sont des horodatages en millisecondes.
+    """
+    def dimension(name):
+        if name in ordinal:
+            return {"name": name, "type": "ordinal"}
+        if name in time:
+            return {"name": name, "type": "time"}
+        return name
+
+    return {
+        "dimensions": [dimension(name) for name in columns],
+        "source": {name: np.asarray(values).tolist() for name, values in columns.items()}
+    }
+
+
+def approx_tooltip(relative_error, trigger="axis", axis_pointer=None):
+    """Infobulle d'un comptage approché : valeur estimée et marge à 95 % (deux erreurs types)
+
+    La valeur est lue dans la dimension encodée sur l'axe y de la série.
+    """
+    formatter = JsCode(f"""
+        function(params) {{
+            var p = Array.isArray(params) ? params[0] : params;
+            var v = p.value[p.encode.y[0]];
+            var margin = Math.max(1, Math.round(v * {2 * relative_error:.6f}));
+            return (p.axisValueLabel || p.name) + '<br/>' + p.marker + '≈ ' + v + ' ± ' + margin + ' (95 %)';
+        }}
+    """).js_code
+    tooltip = {"trigger": trigger, "formatter": formatter}
+    if axis_pointer:
+        tooltip["axisPointer"] = {"type": axis_pointer}
+    return tooltip
+
+
+def category_options(title, labels, values, kind="bar", label_dim="label", value_dim="value",
+                     value_name=None, label_name=None, horizontal=False, rotate=45,
+                     series_style=None, tooltip=None, **extra):
+    """Graphique à un axe de catégories (barres ou courbe) encodé depuis un bloc `dataset`
+
+    `labels` et `values` sont alignés ; la série référence les deux dimensions via `encode`
+    au lieu de porter ses propres listes.
+    """
+    category_axis = {"type": "category"}
+    if label_name:
+        category_axis["name"] = label_name
+    if rotate and not horizontal:
+        category_axis["axisLabel"] = {"rotate": rotate}
+    value_axis = {"type": "value"}
+    if value_name:
+        value_axis["name"] = value_name
+
+    if horizontal:
+        encode = {"x": value_dim, "y": label_dim}
+        x_axis, y_axis = value_axis, category_axis
+    else:
+        encode = {"x": label_dim, "y": value_dim}
+        x_axis, y_axis = category_axis, value_axis
+
+    return {
+        "title": {"text": title},
+        "tooltip": tooltip or {"trigger": "axis", "axisPointer": {"type": "shadow"}},
+        "dataset": dataset_block({label_dim: labels, value_dim: values}, ordinal=(label_dim,)),
+        "xAxis": x_axis,
+        "yAxis": y_axis,
+        "series": [{"type": kind, "encode": encode, **(series_style or {})}],
+        **extra
+    }
+
+
+def time_series_options(title, x_ms, values, value_dim="value", value_name=None,
+                        series_style=None, zoom=None, tooltip=None, **extra):
+    """Courbe sur un axe temporel (x en millisecondes) avec zoom intérieur et curseur
+
+    `zoom` (début, fin) en pourcentage restaure la fenêtre visible après un nouvel échantillonnage.
+    """
+    start, end = zoom or (0, 100)
+    value_axis = {"type": "value"}
+    if value_name:
+        value_axis["name"] = value_name
+
+    return {
+        "title": {"text": title},
+        "tooltip": tooltip or {"trigger": "axis"},
+        "dataset": dataset_block({"date": x_ms, value_dim: values}, time=("date",)),
+        "xAxis": {"type": "time"},
+        "yAxis": value_axis,
+        "dataZoom": [
+            {"type": "inside", "start": start, "end": end},
+            {"type": "slider", "start": start, "end": end},
+        ],
+        "series": [{
+            "type": "line",
+            "encode": {"x": "date", "y": value_dim},
+            "showSymbol": False,
+            **(series_style or {})
+        }],
+        **extra
+    }
+
+
+def windowed_time_series_options(title, window, overview, extent, value_dim="value",
+                                 value_name=None, series_style=None, zoom=None, tooltip=None, **extra):
+    """Courbe dont seule la fenêtre visible est envoyée à pleine résolution
+
+    `window` et `overview` sont des couples (x_ms, valeurs). L'aperçu, invisible dans le tracé,
+    donne au curseur de zoom son ombre sur toute l'étendue `extent` (x_min, x_max), qui fixe
+    aussi les bornes de l'axe pour que les pourcentages de zoom restent stables.
+    """
+    start, end = zoom or (0, 100)
+    value_axis = {"type": "value"}
+    if value_name:
+        value_axis["name"] = value_name
+
+    return {
+        "title": {"text": title},
+        "tooltip": tooltip or {"trigger": "axis"},
+        "dataset": [
+            dataset_block({"date": overview[0], value_dim: overview[1]}, time=("date",)),
+            dataset_block({"date": window[0], value_dim: window[1]}, time=("date",)),
+        ],
+        "xAxis": {"type": "time", "min": int(extent[0]), "max": int(extent[1])},
+        "yAxis": value_axis,
+        "dataZoom": [
+            {"type": "inside", "start": start, "end": end, "filterMode": "none"},
+            {"type": "slider", "start": start, "end": end, "filterMode": "none"},
+        ],
+        "series": [
+            {
+                "type": "line",
+                "datasetIndex": 0,
+                "encode": {"x": "date", "y": value_dim},
+                "showSymbol": False,
+                "silent": True,
+                "lineStyle": {"opacity": 0},
+                "tooltip": {"show": False}
+            },
+            {
+                "type": "line",
+                "datasetIndex": 1,
+                "encode": {"x": "date", "y": value_dim},
+                "showSymbol": False,
+                **(series_style or {})
+            },
+        ],
+        **extra
+    }
+
+
+def pie_options(title, names, values, name_dim="name", value_dim="value", series_style=None):
+    """Camembert encodé depuis un bloc `dataset` (noms et valeurs en colonnes)"""
+    return {
+        "title": {"text": title},
+        "tooltip": {"trigger": "item"},
+        "legend": {"orient": "vertical", "left": "left"},
+        "dataset": dataset_block({name_dim: names, value_dim: values}, ordinal=(name_dim,)),
+        "series": [{
+            "type": "pie",
+            "encode": {"itemName": name_dim, "value": value_dim},
+            **(series_style or {})
+        }]
+    }
+
+
+# Segment horizontal entre les deux valeurs d'une catégorie (données [valeurA, valeurB, rang])
+_DUMBBELL_RENDER_ITEM = JsCode("""
+    function(params, api) {
+        var start = api.coord([api.value(0), api.value(2)]);
+        var end = api.coord([api.value(1), api.value(2)]);
+        return {
+            type: 'line',
+            shape: {x1: start[0], y1: start[1], x2: end[0], y2: end[1]},
+            style: {stroke: 'gray', lineWidth: 2}
+        };
+    }
+""").js_code
+
+
+def dumbbell_options(title, categories, values_a, values_b, name_a, name_b,
+                     x_name="", y_name=""):
+    """Options d'un graphique haltère : une série custom pour les segments et deux nuages de points
+
+    `values_a` et `values_b` sont alignés sur `categories` ; chaque point est placé par le rang de
+    sa catégorie sur l'axe, ce qui évite de répéter les libellés dans les données.
+    """
+    values_a = np.asarray(values_a, dtype=np.int64)
+    values_b = np.asarray(values_b, dtype=np.int64)
+    ranks = np.arange(len(categories))
+
+    return {
+        "title": {"text": title},
+        "tooltip": {"trigger": "item"},
+        "legend": {"data": [name_a, name_b]},
+        "xAxis": {"type": "value", "name": x_name},
+        "yAxis": {"type": "category", "data": [str(cat) for cat in categories], "name": y_name},
+        "series": [
+            {
+                "type": "custom",
+                "renderItem": _DUMBBELL_RENDER_ITEM,
+                "encode": {"x": [0, 1], "y": 2},
+                "silent": True,
+                "z": 1,
+                "data": np.column_stack([values_a, values_b, ranks]).tolist()
+            },
+            {
+                "name": name_a,
+                "type": "scatter",
+                "symbolSize": 12,
+                "itemStyle": {"color": "#5470c6"},
+                "z": 2,
+                "data": np.column_stack([values_a, ranks]).tolist()
+            },
+            {
+                "name": name_b,
+                "type": "scatter",
+                "symbolSize": 12,
+                "itemStyle": {"color": "#91cc75"},
+                "z": 2,
+                "data": np.column_stack([values_b, ranks]).tolist()
+            },
+        ]
+    }
+
+
+def sankey_options(title, subtext, links):
+    """Options d'un diagramme Sankey à partir de liens (source, cible, valeur)
+
+    Les nœuds sont déduits des liens dans l'ordre de première apparition, avec un ensemble
+    pour le dédoublonnage.
+    """
+    nodes = []
+    seen = set()
+    for source, target, _ in links:
+        for name in (source, target):
+            if name not in seen:
+                seen.add(name)
+                nodes.append({"name": name})
+
+    return {
+        "title": {"text": title, "subtext": subtext},
+        "tooltip": {"trigger": "item", "triggerOn": "mousemove"},
+        "series": [{
+            "type": "sankey",
+            "data": nodes,
+            "links": [
+                {"source": source, "target": target, "value": value}
+                for source, target, value in links
+            ],
+            "emphasis": {"focus": "adjacency"},
+            "lineStyle": {"color": "gradient", "curveness": 0.5}
+        }]
+    }
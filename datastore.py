@@ -0,0 +1,654 @@
+import datetime
+import hashlib
+import json
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow.feather as feather
+except ImportError:  # pyarrow absent : on relit toujours le CSV
+    feather = None
+
+# Lecteur CSV multithread de pyarrow quand il est installé, sinon le lecteur C de pandas
+CSV_ENGINE = "c" if feather is None else "pyarrow"
+
+
+# Schéma compact : identifiants en entiers étroits, date conservée uniquement en entier AAAAMMJJ
+SCHEMA = {
+    'dateID': 'int32',
+    'prodID': 'int32',
+    'catID': 'int8',
+    'fabID': 'int16',
+    'magID': 'int16',
+}
+
+# Types de repli quand une valeur dépasse le type déclaré
+_INT_TYPES = ['int8', 'int16', 'int32', 'int64']
+
+# Description des sources de données : un même fichier n'est lu qu'une fois par processus
+SOURCES = {
+    "pdv": {
+        "path": "./data/pointsDeVente-tous.csv",
+        "sep": ",",
+        "header": 0,
+        "names": ['dateID', 'prodID', 'catID', 'fabID', 'magID'],
+    },
+    "produits": {
+        "path": "./data/produits-tous.csv",
+        "sep": ";",
+        "header": None,
+        "names": ['dateID', 'prodID', 'catID', 'fabID'],
+    },
+}
+
+# Répertoire des fichiers Feather dérivés des CSV
+CACHE_DIR = "./data/.cache"
+
+# Au-delà de cette taille de CSV, la source n'est pas chargée : elle est résumée par blocs (streaming.py)
+STREAM_ABOVE_BYTES = 4 * 1024 ** 3
+
+# Jeux de données chargés, partagés par toutes les démos du processus
+_datasets = {}
+_versions = {}
+_load_stats = {}
+# Index de chaque source, rattachés à la table sur laquelle ils ont été construits :
+# {nom: (DataFrame, {dim: RowIndex})}
+_indexes = {}
+# Empreinte (mtime, taille, sha1) du CSV de base et extraits ajoutés depuis [(nom, sha1)]
+_fingerprints = {}
+_ingested = {}
+# Sources résumées par blocs : {nom: {'extent': (premier, dernier dateID), 'values': {dim: valeurs triées}}}
+_streamed = {}
+_lock = threading.Lock()
+
+
+class RowsUnavailable(RuntimeError):
+    """Les lignes d'une source résumée par blocs ne sont pas chargées en mémoire"""
+
+
+def _freeze(df):
+    """Reconstruit le DataFrame sur des tableaux en lecture seule"""
+    columns = {}
+    for col in df.columns:
+        values = df[col].to_numpy()
+        # Les colonnes projetées depuis le cache Feather sont déjà en lecture seule
+        if values.flags.writeable:
+            values = np.array(values, copy=True)
+            values.flags.writeable = False
+        columns[col] = values
+    return pd.DataFrame(columns, index=df.index, copy=False)
+
+
+def _narrow(values, dtype):
+    """Type entier déclaré, élargi si les valeurs n'y tiennent pas (read_csv tronquerait sans erreur)"""
+    if len(values) == 0:
+        return dtype
+    lo, hi = values.min(), values.max()
+    for candidate in _INT_TYPES[_INT_TYPES.index(dtype):]:
+        info = np.iinfo(candidate)
+        if info.min <= lo and hi <= info.max:
+            return candidate
+    return 'int64'
+
+
+def apply_schema(df):
+    """Convertit les colonnes connues vers les types compacts de SCHEMA"""
+    return df.astype({
+        col: _narrow(df[col].to_numpy(), dtype)
+        for col, dtype in SCHEMA.items()
+        if col in df.columns
+    })
+
+
+def _sort_by_date(df):
+    """Trie les lignes par dateID (tri stable) pour permettre les sélections par dichotomie"""
+    if df['dateID'].is_monotonic_increasing:
+        return df
+    return df.sort_values('dateID', kind='stable', ignore_index=True)
+
+
+def _read_csv(spec):
+    """Lit un fichier source avec les noms de colonnes canoniques et le schéma compact
+
+    Toutes les colonnes sont lues en int64 déclaré : une valeur non numérique échoue au lieu de
+    produire une colonne object, puis apply_schema les réduit aux types de SCHEMA.
+    """
+    df = pd.read_csv(
+        spec["path"], sep=spec["sep"], header=spec["header"], names=spec["names"],
+        dtype={col: 'int64' for col in spec["names"]}, engine=CSV_ENGINE,
+    )
+    return _sort_by_date(apply_schema(df))
+
+
+def date_to_id(d):
+    """Convertit une date (date, datetime ou Timestamp) en entier AAAAMMJJ"""
+    return d.year * 10000 + d.month * 100 + d.day
+
+
+def id_to_date(date_id):
+    """Convertit un entier AAAAMMJJ en datetime.date"""
+    date_id = int(date_id)
+    return datetime.date(date_id // 10000, date_id // 100 % 100, date_id % 100)
+
+
+def ids_to_epoch_ms(date_ids):
+    """Convertit des entiers AAAAMMJJ en millisecondes depuis l'epoch (axes temporels ECharts)"""
+    date_ids = np.asarray(date_ids, dtype=np.int64)
+    months = (date_ids // 10000 - 1970).astype('datetime64[Y]') + (date_ids // 100 % 100 - 1).astype('timedelta64[M]')
+    days = months.astype('datetime64[D]') + (date_ids % 100 - 1).astype('timedelta64[D]')
+    return days.astype('datetime64[ms]').astype(np.int64)
+
+
+def epoch_ms_to_id(ms):
+    """Convertit un horodatage en millisecondes en entier AAAAMMJJ (jour UTC)"""
+    day = np.datetime64(int(ms), 'ms').astype('datetime64[D]').item()
+    return date_to_id(day)
+
+
+def period_start_ids(date_ids, granularite):
+    """dateID du premier jour de la période de chaque dateID : mois ("M"), semaine du lundi ("W") ou jour ("D")"""
+    date_ids = np.asarray(date_ids, dtype=np.int64)
+    if granularite == "M":
+        return date_ids // 100 * 100 + 1
+    if granularite == "D":
+        return date_ids
+    days = ids_to_epoch_ms(date_ids) // 86_400_000
+    # Le 1er janvier 1970 est un jeudi : (jours + 3) % 7 vaut 0 le lundi
+    mondays = (days - (days + 3) % 7).astype('datetime64[D]')
+    months = mondays.astype('datetime64[M]')
+    month_numbers = months.astype(np.int64)
+    return (
+        (month_numbers // 12 + 1970) * 10000
+        + (month_numbers % 12 + 1) * 100
+        + (mondays - months).astype(np.int64) + 1
+    )
+
+
+def period_end_id(date_id, granularite):
+    """Dernier dateID de la période ("M", "W" ou "D") qui contient `date_id`"""
+    start = id_to_date(period_start_ids([date_id], granularite)[0])
+    if granularite == "M":
+        # Le 28 plus 4 jours tombe toujours dans le mois suivant
+        end = (start.replace(day=28) + datetime.timedelta(days=4)).replace(day=1) - datetime.timedelta(days=1)
+    elif granularite == "W":
+        end = start + datetime.timedelta(days=6)
+    else:
+        end = start
+    return date_to_id(end)
+
+
+def month_label(month_id):
+    """Libellé 'AAAA-MM' d'un mois encodé AAAAMM (dateID // 100)"""
+    return f"{month_id // 100}-{month_id % 100:02d}"
+
+
+def _file_hash(path, chunk_size=1 << 20):
+    """Empreinte SHA-1 du contenu d'un fichier"""
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _cache_paths(name):
+    return (
+        os.path.join(CACHE_DIR, f"{name}.feather"),
+        os.path.join(CACHE_DIR, f"{name}.json"),
+    )
+
+
+def _read_meta(name):
+    """Métadonnées du cache de `name` ({'mtime_ns', 'size', 'sha1'}), ou None"""
+    _, meta_path = _cache_paths(name)
+    try:
+        with open(meta_path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_meta(name, mtime_ns, size, sha1, ingested=()):
+    _, meta_path = _cache_paths(name)
+    with open(meta_path + ".tmp", "w") as f:
+        json.dump({
+            "mtime_ns": mtime_ns, "size": size, "sha1": sha1, "schema": SCHEMA,
+            "ingested": [list(item) for item in ingested],
+        }, f)
+    os.replace(meta_path + ".tmp", meta_path)
+
+
+def _chain_version(sha1, ingested):
+    """Version d'une source : préfixe du SHA-1 du CSV, chaîné avec celui de chaque extrait ajouté"""
+    if not ingested:
+        return sha1[:12]
+    digest = hashlib.sha1(sha1.encode())
+    for _, extract_sha1 in ingested:
+        digest.update(extract_sha1.encode())
+    return digest.hexdigest()[:12]
+
+
+def _source_fingerprint(spec, meta):
+    """Retourne (mtime, taille, sha1) du CSV ; le hash n'est recalculé que si mtime ou taille ont changé"""
+    stat = os.stat(spec["path"])
+    if meta and meta.get("mtime_ns") == stat.st_mtime_ns and meta.get("size") == stat.st_size:
+        return stat.st_mtime_ns, stat.st_size, meta["sha1"]
+    return stat.st_mtime_ns, stat.st_size, _file_hash(spec["path"])
+
+
+def _read_cache(name):
+    """Charge le fichier Feather de `name` en memory-map, ou None s'il est absent ou illisible"""
+    return _read_feather(_cache_paths(name)[0])
+
+
+def _read_feather(data_path):
+    try:
+        table = feather.read_table(data_path, memory_map=True)
+    except (OSError, ValueError):
+        return None
+    # split_blocks évite la consolidation, les colonnes numériques restent projetées sans copie
+    return table.to_pandas(split_blocks=True)
+
+
+def _write_cache(name, df, mtime_ns, size, sha1, ingested=()):
+    """Écrit le fichier Feather non compressé puis ses métadonnées (écriture atomique)"""
+    data_path, _ = _cache_paths(name)
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        feather.write_feather(df, data_path + ".tmp", compression="uncompressed")
+        os.replace(data_path + ".tmp", data_path)
+        _write_meta(name, mtime_ns, size, sha1, ingested)
+    except OSError:
+        # Répertoire en lecture seule : on se passe du cache
+        pass
+
+
+def _read_source(name, spec):
+    """Charge une source depuis le cache columnaire s'il est à jour, sinon depuis le CSV"""
+    start = time.perf_counter()
+    meta = _read_meta(name)
+    mtime_ns, size, sha1 = _source_fingerprint(spec, meta)
+
+    df = None
+    ingested = []
+    if feather is not None and meta and meta.get("sha1") == sha1 and meta.get("schema") == SCHEMA:
+        df = _read_cache(name)
+
+    if df is not None:
+        origin = "cache"
+        # Le cache contient aussi les extraits ajoutés depuis la lecture du CSV
+        ingested = meta.get("ingested", [])
+        if meta["mtime_ns"] != mtime_ns:
+            # Fichier touché sans changement de contenu : on rafraîchit les métadonnées
+            try:
+                _write_meta(name, mtime_ns, size, sha1, ingested)
+            except OSError:
+                pass
+    else:
+        df = _read_csv(spec)
+        if feather is not None:
+            origin = "csv"
+            _write_cache(name, df, mtime_ns, size, sha1)
+        else:
+            origin = "csv (pyarrow absent)"
+
+    # Le cache est écrit trié ; on revérifie pour les fichiers produits par une version antérieure
+    df = _sort_by_date(df)
+
+    _versions[name] = _chain_version(sha1, ingested)
+    _fingerprints[name] = (mtime_ns, size, sha1)
+    _ingested[name] = ingested
+    _load_stats[name] = {
+        "origin": origin,
+        "ingested": len(ingested),
+        "seconds": time.perf_counter() - start,
+        # Empreinte équivalente sans schéma : colonnes int64 plus une colonne datetime64
+        "bytes_before_schema": len(df) * 8 * (len(spec["names"]) + 1),
+    }
+    return _freeze(df)
+
+
+def get_dataset(name):
+    """Retourne le DataFrame partagé (lecture seule) de la source `name`, chargé au premier appel"""
+    df = _datasets.get(name)
+    if df is not None:
+        return df
+
+    with _lock:
+        # Un autre thread a pu charger la source pendant l'attente du verrou
+        df = _datasets.get(name)
+        if df is None:
+            if should_stream(name):
+                raise RowsUnavailable(
+                    f"{SOURCES[name]['path']} dépasse {STREAM_ABOVE_BYTES / 1e9:.1f} Go : "
+                    "source résumée par blocs, ses lignes ne sont pas chargées"
+                )
+            df = _read_source(name, SOURCES[name])
+            _datasets[name] = df
+    return df
+
+
+class RowIndex:
+    """Index inversé d'une colonne : valeur -> positions (triées) des lignes qui la portent"""
+
+    def __init__(self, values):
+        order = np.argsort(values, kind='stable')
+        self._set(values[order], order)
+
+    def _set(self, sorted_values, order):
+        starts = np.flatnonzero(np.r_[True, sorted_values[1:] != sorted_values[:-1]]) if len(sorted_values) else []
+        self.keys = sorted_values[starts]
+        self._bounds = np.append(starts, len(sorted_values)).astype(np.int64)
+        self._order = order
+        self._order.flags.writeable = False
+
+    def extended(self, values, offset):
+        """Nouvel index couvrant aussi les lignes `values` ajoutées à partir de la position `offset`
+
+        Seul le bloc ajouté est trié ; il est ensuite fusionné avec l'ordre existant. Pour une
+        même valeur, les positions ajoutées suivent les anciennes, donc chaque liste de
+        positions reste croissante.
+        """
+        new_order = np.argsort(values, kind='stable')
+        new_sorted = values[new_order]
+        counts = np.diff(self._bounds)
+        n_old = len(self._order)
+
+        # Place finale de chaque élément : son rang dans son bloc plus le nombre d'éléments de
+        # l'autre bloc qui le précèdent
+        old_dest = np.arange(n_old) + np.repeat(np.searchsorted(new_sorted, self.keys, side='left'), counts)
+        new_dest = np.arange(len(new_sorted)) + self._bounds[np.searchsorted(self.keys, new_sorted, side='right')]
+
+        sorted_values = np.empty(n_old + len(new_sorted), dtype=np.result_type(self.keys, new_sorted))
+        sorted_values[old_dest] = np.repeat(self.keys, counts)
+        sorted_values[new_dest] = new_sorted
+        order = np.empty(len(sorted_values), dtype=np.int64)
+        order[old_dest] = self._order
+        order[new_dest] = new_order + offset
+
+        index = RowIndex.__new__(RowIndex)
+        index._set(sorted_values, order)
+        return index
+
+    def positions(self, key):
+        """Positions croissantes des lignes où la colonne vaut `key` (vide si absente)"""
+        i = np.searchsorted(self.keys, key)
+        if i == len(self.keys) or self.keys[i] != key:
+            return self._order[:0]
+        return self._order[self._bounds[i]:self._bounds[i + 1]]
+
+    def positions_in(self, keys):
+        """Positions croissantes des lignes dont la valeur est dans `keys` (union des listes)"""
+        parts = [self.positions(key) for key in keys]
+        if not parts:
+            return self._order[:0]
+        return np.sort(np.concatenate(parts))
+
+
+def _snapshot(name):
+    """Table courante de `name` et index de cette même table, lus ensemble
+
+    Un ajout de lignes remplace les deux à la fois : une sélection qui travaille sur un
+    instantané n'associe jamais l'ancienne table aux positions du nouvel index.
+    """
+    get_dataset(name)
+    with _lock:
+        df = _datasets[name]
+        entry = _indexes.get(name)
+        if entry is None or entry[0] is not df:
+            entry = (df, {})
+            _indexes[name] = entry
+    return entry
+
+
+def row_index(name, dim, snapshot=None):
+    """Index de la colonne `dim` de la source `name` (ou de l'instantané donné), construit au premier appel"""
+    df, indexes = snapshot or _snapshot(name)
+    index = indexes.get(dim)
+    if index is None:
+        with _lock:
+            index = indexes.get(dim)
+            if index is None:
+                index = RowIndex(df[dim].to_numpy())
+                indexes[dim] = index
+    return index
+
+
+def distinct_values(name, dim):
+    """Valeurs distinctes triées de `dim`, lues dans l'index (ou dans le résumé d'une source par blocs)"""
+    if name in _streamed:
+        return list(_streamed[name]["values"][dim])
+    return row_index(name, dim).keys.tolist()
+
+
+def date_extent(name):
+    """Premier et dernier dateID de la source (table triée par date)"""
+    if name in _streamed:
+        return _streamed[name]["extent"]
+    dates = get_dataset(name)['dateID'].to_numpy()
+    return int(dates[0]), int(dates[-1])
+
+
+def date_range_bounds(name, start_id=None, end_id=None, df=None):
+    """Bornes [début, fin) des lignes dont dateID est compris entre start_id et end_id inclus"""
+    dates = (get_dataset(name) if df is None else df)['dateID'].to_numpy()
+    lo = 0 if start_id is None else int(np.searchsorted(dates, start_id, side='left'))
+    hi = len(dates) if end_id is None else int(np.searchsorted(dates, end_id, side='right'))
+    return lo, max(lo, hi)
+
+
+def date_slice(name, start_id=None, end_id=None):
+    """Tranche des lignes entre deux dateID inclus, obtenue par dichotomie et sans copie"""
+    df = get_dataset(name)
+    lo, hi = date_range_bounds(name, start_id, end_id, df)
+    return df.iloc[lo:hi]
+
+
+def select_positions(name, date_range=None, snapshot=None, **filters):
+    """Positions des lignes vérifiant toutes les égalités `dim=valeur` (intersection des index)
+
+    Une liste de valeurs sélectionne leur union. `date_range` (début, fin) restreint en plus aux
+    dateID compris entre les deux bornes incluses. Les positions se rapportent à la table de
+    `snapshot` (voir `_snapshot`), la table courante par défaut.
+    """
+    snapshot = snapshot or _snapshot(name)
+    df = snapshot[0]
+    positions = None
+    for dim, key in filters.items():
+        index = row_index(name, dim, snapshot)
+        rows = index.positions_in(key) if isinstance(key, (list, tuple)) else index.positions(key)
+        positions = rows if positions is None else np.intersect1d(positions, rows, assume_unique=True)
+        if len(positions) == 0:
+            break
+
+    if date_range is not None:
+        lo, hi = date_range_bounds(name, *date_range, df=df)
+        if positions is None:
+            return np.arange(lo, hi)
+        # Positions et dates sont croissantes ensemble : la plage est une tranche contiguë
+        return positions[np.searchsorted(positions, lo):np.searchsorted(positions, hi)]
+
+    if positions is None:
+        positions = np.arange(len(df))
+    return positions
+
+
+def select(name, date_range=None, **filters):
+    """Sous-ensemble des lignes de `name` vérifiant les filtres, sans parcourir toute la table"""
+    if not filters:
+        return date_slice(name, *(date_range or (None, None)))
+    snapshot = _snapshot(name)
+    return snapshot[0].iloc[select_positions(name, date_range=date_range, snapshot=snapshot, **filters)]
+
+
+def append_rows(name, rows, label, sha1):
+    """Ajoute à la source `name` les lignes d'un extrait (colonnes canoniques) ; retourne (ancienne, nouvelle) version
+
+    Quand l'extrait ne précède aucune date déjà chargée, les index existants sont prolongés ;
+    sinon la table est retriée et les index seront reconstruits à la demande. Le cache Feather
+    est réécrit avec la liste des extraits, pour qu'un redémarrage ne relise que le cache.
+    """
+    get_dataset(name)
+    with _lock:
+        old = _datasets[name]
+        old_version = _versions[name]
+        rows = _sort_by_date(apply_schema(rows[list(old.columns)]))
+        in_order = len(old) == 0 or rows['dateID'].iat[0] >= old['dateID'].iat[-1]
+
+        df = _freeze(_sort_by_date(apply_schema(pd.concat([old, rows], ignore_index=True))))
+        ingested = _ingested[name] + [[label, sha1]]
+        mtime_ns, size, base_sha1 = _fingerprints[name]
+        version = _chain_version(base_sha1, ingested)
+
+        # Les index de l'ancienne table restent valables pour les sélections en cours
+        entry = _indexes.pop(name, None)
+        if in_order and entry is not None and entry[0] is old:
+            _indexes[name] = (df, {
+                dim: index.extended(rows[dim].to_numpy(), len(old))
+                for dim, index in entry[1].items()
+            })
+
+        _datasets[name] = df
+        _versions[name] = version
+        _ingested[name] = ingested
+        _load_stats[name]["ingested"] = len(ingested)
+
+    if feather is not None:
+        _write_cache(name, df, mtime_ns, size, base_sha1, ingested)
+    return old_version, version
+
+
+def should_stream(name):
+    """Vrai si la source est résumée par blocs : déjà résumée, ou CSV au-delà de STREAM_ABOVE_BYTES"""
+    if name in _streamed:
+        return True
+    if name in _datasets:
+        return False
+    try:
+        return os.path.getsize(SOURCES[name]["path"]) > STREAM_ABOVE_BYTES
+    except OSError:
+        return False
+
+
+def register_summary(name, version, extent, values, stats, ingested=()):
+    """Enregistre une source résumée par blocs : version, étendue des dates, valeurs par dimension"""
+    with _lock:
+        _streamed[name] = {"extent": extent, "values": values}
+        _versions[name] = version
+        _load_stats[name] = stats
+        _ingested[name] = list(ingested)
+
+
+def ingested_hashes(name):
+    """SHA-1 des extraits déjà ajoutés à la source `name` depuis la lecture de son CSV"""
+    if name not in _versions:
+        get_dataset(name)
+    return {sha1 for _, sha1 in _ingested.get(name, [])}
+
+
+def dataset_version(name):
+    """Identifiant du contenu de la source (SHA-1 du CSV chaîné avec les extraits ajoutés), chargée au besoin"""
+    if name not in _versions:
+        get_dataset(name)
+    return _versions[name]
+
+
+def memory_report():
+    """Empreinte mémoire des jeux de données chargés : {nom: {'rows', 'bytes', 'bytes_before_schema', 'origin', 'seconds'}}
+
+    Pour une source résumée par blocs, 'bytes' est la taille du résumé et 'peak_bytes' le pic
+    mesuré pendant la lecture.
+    """
+    report = {
+        name: {
+            "rows": len(df),
+            "bytes": int(df.memory_usage(deep=True).sum()),
+            **_load_stats.get(name, {}),
+        }
+        for name, df in _datasets.items()
+    }
+    for name in _streamed:
+        report[name] = dict(_load_stats[name])
+    return report
+
+
+def compare_load_times(name):
+    """Mesure le chargement de `name` depuis le CSV puis depuis le cache Feather (en secondes)"""
+    spec = SOURCES[name]
+    start = time.perf_counter()
+    df = _read_csv(spec)
+    timings = {"csv": time.perf_counter() - start}
+
+    if feather is not None:
+        # Fichier à part : le cache en place peut contenir des extraits ajoutés absents du CSV
+        data_path = os.path.join(CACHE_DIR, f"{name}.timing.feather")
+        try:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            feather.write_feather(df, data_path, compression="uncompressed")
+        except OSError:
+            return timings
+        start = time.perf_counter()
+        cached = _read_feather(data_path)
+        if cached is not None:
+            timings["cache"] = time.perf_counter() - start
+        # La projection mémoire est libérée avant de supprimer le fichier
+        del cached
+        os.remove(data_path)
+    return timings
+
+
+def extends(ingested, known):
+    """Vrai si la liste d'extraits `ingested` prolonge `known` d'au moins un extrait"""
+    return len(ingested) > len(known) and [list(item) for item in ingested[:len(known)]] == known
+
+
+def refresh(name):
+    """Oublie `name` si son cache porte des extraits ajoutés par un autre processus ; retourne True dans ce cas
+
+    L'ingestion n'a lieu que dans un processus à la fois (ingest.py) : les autres reprennent
+    le cache à jour au prochain accès au lieu d'ingérer eux-mêmes.
+    """
+    fingerprint, known = _fingerprints.get(name), _ingested.get(name)
+    if name not in _datasets or fingerprint is None or known is None:
+        return False
+    meta = _read_meta(name)
+    if not meta or meta.get("sha1") != fingerprint[2] or not extends(meta.get("ingested", []), known):
+        return False
+    forget(name)
+    return True
+
+
+def forget(name):
+    """Oublie la source `name` : elle sera relue au prochain accès"""
+    with _lock:
+        for table in (_datasets, _versions, _load_stats, _indexes, _fingerprints, _ingested, _streamed):
+            table.pop(name, None)
+
+
+def clear():
+    """Oublie les jeux de données chargés (ils seront relus au prochain accès)"""
+    with _lock:
+        _datasets.clear()
+        _versions.clear()
+        _load_stats.clear()
+        _indexes.clear()
+        _fingerprints.clear()
+        _ingested.clear()
+        _streamed.clear()
+
+
+if __name__ == "__main__":
+    for source in SOURCES:
+        if not os.path.exists(SOURCES[source]["path"]):
+            print(f"{source}: fichier absent ({SOURCES[source]['path']})")
+            continue
+        timings = compare_load_times(source)
+        print(f"{source}: " + ", ".join(f"{k} {v * 1000:.1f} ms" for k, v in timings.items()))
+
+    get_dataset("pdv")
+    for source, report in memory_report().items():
+        print(f"{source}: {report['bytes_before_schema'] / 1e6:.1f} Mo -> {report['bytes'] / 1e6:.1f} Mo")
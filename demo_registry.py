@@ -0,0 +1,57 @@
+import importlib
+import sys
+import threading
+import time
+
+
+# Démos disponibles : nom affiché -> (module, fonction). Seule liste des démos : les modules
+# n'en déclarent pas d'autre. Aucun module n'est importé ici ; chaque module l'est au
+# premier affichage d'une de ses démos.
+DEMOS = {
+    "Produits par Catégorie": ("fullcollab_streamlit", "render_produits_par_categorie"),
+    "Produits par Fabricant": ("fullcollab_streamlit", "render_produits_par_fabricant"),
+    "Magasins par Catégorie": ("fullcollab_streamlit", "render_magasins_par_categorie"),
+    "Magasins par Fabricant": ("fullcollab_streamlit", "render_magasins_par_fabricant"),
+    "Tendance Mensuelle": ("fullcollab_streamlit", "render_tendance_produits_mensuelle"),
+    "Diagramme Sankey": ("fullcollab_streamlit", "render_sankey_diagram"),
+    "Flux Multi-niveaux": ("fullcollab_streamlit", "render_flux_multi_niveaux"),
+    "Top Magasins par Catégorie": ("emma_diag", "render_top_magasins_categorie"),
+    "Score Santé Fabricant": ("emma_diag", "render_score_sante_fabricant"),
+    "Présence sur le Marché": ("emma_diag", "render_presence_marche"),
+    "Disponibilité Magasins": ("emma_diag", "render_disponibilite_magasins"),
+    "Ratio Accords/Produits": ("emma_diag", "render_ratio_accords_produits"),
+    "Intensité Concurrentielle": ("emma_diag", "render_intensite_concurrentielle"),
+    "Croissance Catalogue": ("emma_diag", "render_croissance_catalogue"),
+}
+
+# Durée du premier import de chaque module, en secondes
+_import_times = {}
+_lock = threading.Lock()
+
+
+def import_module(module_path):
+    """Importe `module_path` en mesurant la durée du premier import"""
+    module = sys.modules.get(module_path)
+    if module is not None:
+        return module
+    with _lock:
+        if module_path in sys.modules:
+            return sys.modules[module_path]
+        start = time.perf_counter()
+        module = importlib.import_module(module_path)
+        _import_times[module_path] = time.perf_counter() - start
+    return module
+
+
+def get_demo(name):
+    """Fonction de rendu de la démo `name`, en important son module au besoin (None si inconnue)"""
+    entry = DEMOS.get(name)
+    if entry is None:
+        return None
+    module_path, function_name = entry
+    return getattr(import_module(module_path), function_name, None)
+
+
+def import_times():
+    """Modules importés jusqu'ici et durée de leur premier import : {module: secondes}"""
+    return dict(_import_times)
@@ -0,0 +1,126 @@
+import numpy as np
+
+
+# Modes proposés dans les pages : LTTB, min/max par intervalle, ou aucun échantillonnage
+MODES = {
+    "lttb": "LTTB",
+    "minmax": "Min / max",
+    "none": "Aucun",
+}
+
+# Largeur supposée d'un graphique pleine page, en pixels
+DEFAULT_CHART_WIDTH = 1000
+
+
+def point_budget(width_px=DEFAULT_CHART_WIDTH, px_per_point=2, minimum=20):
+    """Nombre de points utiles pour un graphique de `width_px` pixels de large"""
+    return max(minimum, int(width_px // px_per_point))
+
+
+def lttb_indices(x, y, n_out):
+    """Positions retenues par Largest-Triangle-Three-Buckets (premier et dernier points inclus)"""
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    # Intervalles intérieurs de taille égale, les extrémités étant conservées à part
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    previous = 0
+    for i in range(n_out - 2):
+        start, stop = edges[i], edges[i + 1]
+        # Sommet suivant : moyenne de l'intervalle d'après (ou dernier point)
+        if i + 2 < len(edges):
+            next_x = x[edges[i + 1]:edges[i + 2]].mean()
+            next_y = y[edges[i + 1]:edges[i + 2]].mean()
+        else:
+            next_x, next_y = x[-1], y[-1]
+        area = np.abs(
+            (x[previous] - next_x) * (y[start:stop] - y[previous])
+            - (x[previous] - x[start:stop]) * (next_y - y[previous])
+        )
+        previous = start + int(np.argmax(area))
+        selected[i + 1] = previous
+    return selected
+
+
+def minmax_indices(x, y, n_out):
+    """Positions du minimum et du maximum de chaque intervalle (premier et dernier points inclus)"""
+    n = len(x)
+    if n_out >= n or n_out < 4:
+        return np.arange(n)
+
+    y = np.asarray(y)
+    n_buckets = (n_out - 2) // 2
+    buckets = np.arange(n) * n_buckets // n
+    # Tri par (intervalle, valeur) : le premier de chaque intervalle est le min, le dernier le max
+    order = np.lexsort((y, buckets))
+    starts = np.searchsorted(buckets[order], np.arange(n_buckets), side='left')
+    stops = np.searchsorted(buckets[order], np.arange(n_buckets), side='right') - 1
+    return np.unique(np.concatenate(([0, n - 1], order[starts], order[stops])))
+
+
+def downsample(x, y, n_out, mode="lttb"):
+    """Réduit la série (x, y), triée selon x, à environ `n_out` points"""
+    x = np.asarray(x)
+    y = np.asarray(y)
+    if mode == "lttb":
+        keep = lttb_indices(x, y, n_out)
+    elif mode == "minmax":
+        keep = minmax_indices(x, y, n_out)
+    else:
+        return x, y
+    return x[keep], y[keep]
+
+
+def zoom_window(x, zoom):
+    """Fenêtre (x_min, x_max) correspondant à un zoom (début, fin) en pourcentage de l'étendue de x"""
+    if not zoom or len(x) == 0:
+        return None
+    start, end = zoom
+    if start <= 0 and end >= 100:
+        return None
+    span = x[-1] - x[0]
+    return x[0] + span * start / 100, x[0] + span * end / 100
+
+
+def split_window(x, y, window, overview_points, mode="minmax"):
+    """Tranche visible à pleine résolution et aperçu grossier de toute la série
+
+    Retourne ((x_fenêtre, y_fenêtre), (x_aperçu, y_aperçu)) ; la tranche est trouvée par
+    dichotomie sur x trié, sans parcourir la série.
+    """
+    x = np.asarray(x)
+    y = np.asarray(y)
+    if window is None:
+        lo, hi = 0, len(x)
+    else:
+        lo, hi = np.searchsorted(x, window[0], side='left'), np.searchsorted(x, window[1], side='right')
+    return (x[lo:hi], y[lo:hi]), downsample(x, y, overview_points, mode)
+
+
+def downsample_window(x, y, n_out, mode="lttb", window=None, overview_share=0.25):
+    """Échantillonne en concentrant le budget sur la fenêtre visible `window` = (x_min, x_max)
+
+    Hors de la fenêtre, la série garde une version grossière (`overview_share` du budget) pour
+    que l'axe et le curseur de zoom couvrent toujours toute la période.
+    """
+    x = np.asarray(x)
+    y = np.asarray(y)
+    if window is None or mode == "none":
+        return downsample(x, y, n_out, mode)
+
+    lo, hi = np.searchsorted(x, window[0], side='left'), np.searchsorted(x, window[1], side='right')
+    overview_x, overview_y = downsample(x, y, max(4, int(n_out * overview_share)), mode)
+    window_x, window_y = downsample(x[lo:hi], y[lo:hi], n_out, mode)
+
+    outside = (overview_x < window[0]) | (overview_x > window[1])
+    merged_x = np.concatenate((overview_x[outside], window_x))
+    merged_y = np.concatenate((overview_y[outside], window_y))
+    order = np.argsort(merged_x, kind='stable')
+    return merged_x[order], merged_y[order]
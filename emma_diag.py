@@ -1,98 +1,94 @@
 import datetime
+import numpy as np
 import pandas as pd
 import streamlit as st
 from streamlit_echarts import st_echarts, JsCode
 
-str
-# Variables globales pour stocker les données
-_cached_produits = None
-_cached_pdv = None
+import aggregates
+import chart_options
+import datastore
+import downsampling
+import payloads
+import result_cache
 
 
-def load_data():
-    """Charge les données des fichiers CSV"""
-    global _cached_produits, _cached_pdv
-
-    if _cached_produits is not None and _cached_pdv is not None:
-        return _cached_produits, _cached_pdv
+def load_data(name="pdv"):
+    """Retourne le jeu de données partagé `name` ("pdv" ou "produits"), chargé au premier appel
 
+    Chaque page ne charge que la source dont elle a besoin : l'absence du catalogue produits
+    n'empêche pas les pages fondées sur les points de vente.
+    """
     try:
-        file_produits = "./data/produits-tous.csv"
-        file_pdv = "./data/pointsDeVente-tous.csv"
-
-        col_produits = ['dateID', 'prodID', 'catID', 'fabID']
-        produits = pd.read_csv(file_produits, sep=";", header=None, names=col_produits)
-
-        col_pdv = ['dateID', 'prodID', 'catID', 'fabID', 'magID']
-        pdv = pd.read_csv(file_pdv, sep=",", header=5, names=col_pdv)
-
-        # Conversion des dates
-        produits['date'] = pd.to_datetime(produits['dateID'].astype(str), format='%Y%m%d', errors='coerce')
-        pdv['date'] = pd.to_datetime(pdv['dateID'].astype(str), format='%Y%m%d', errors='coerce')
+        # Extraits ajoutés par le processus d'ingestion : repris sans redémarrage
+        datastore.refresh(name)
+        return datastore.get_dataset(name)
+    except Exception as e:
+        st.error(f"Erreur lors du chargement de {datastore.SOURCES[name]['path']}: {e}")
+        return None
 
-        _cached_produits = produits
-        _cached_pdv = pdv
 
-        return produits, pdv
-    except Exception as e:
-        st.error(f"Erreur lors du chargement: {e}")
-        return None, None
+@result_cache.cached()
+def compute_top_magasins(catID):
+    """Top 10 magasins (nombre de lignes) et nombre de fabricants d'une catégorie"""
+    subset = datastore.select("pdv", catID=catID)
+    top10_mag = subset.groupby('magID')['prodID'].count().nlargest(10).sort_values()
+    return top10_mag, subset['fabID'].nunique()
 
 
 def render_top_magasins_categorie():
     """Top 10 magasins par catégorie"""
-    produits, pdv = load_data()
-    if pdv is None:
+    if load_data("pdv") is None:
         return
 
-    listeCats = sorted(pdv['catID'].unique())
+    listeCats = datastore.distinct_values("pdv", 'catID')
     catID = st.selectbox("Sélectionner une catégorie", listeCats, key="cat_top_mag")
 
-    subset = pdv[pdv['catID'] == catID]
-    top10_mag = subset.groupby('magID')['prodID'].count().nlargest(10).sort_values()
-
-    options = {
-        "title": {"text": f"Top 10 magasins pour la catégorie {catID}"},
-        "tooltip": {"trigger": "axis", "axisPointer": {"type": "shadow"}},
-        "xAxis": {"type": "value", "name": "Nombre de produits"},
-        "yAxis": {
-            "type": "category",
-            "data": [str(x) for x in top10_mag.index.tolist()],
-            "name": "ID du magasin"
-        },
-        "series": [{
-            "data": top10_mag.values.tolist(),
-            "type": "bar",
-            "itemStyle": {"color": "#5470c6"}
-        }]
-    }
+    top10_mag, fabricants = compute_top_magasins(catID)
+
+    options = chart_options.category_options(
+        f"Top 10 magasins pour la catégorie {catID}",
+        top10_mag.index.to_numpy(),
+        top10_mag.to_numpy(),
+        label_dim='magID',
+        value_dim='produits',
+        value_name="Nombre de produits",
+        label_name="ID du magasin",
+        horizontal=True,
+        series_style={"itemStyle": {"color": "#5470c6"}}
+    )
     st_echarts(options=options, height="500px")
 
     # Afficher le nombre d'acteurs
-    fabricants = subset['fabID'].nunique()
     st.metric("Nombre de fabricants dans cette catégorie", fabricants)
 
 
+@result_cache.cached()
+def compute_score_sante(catID, fabID):
+    """Score santé du fabricant dans la catégorie et moyenne de produits par fabricant"""
+    subset = datastore.select("pdv", catID=catID)
+    total_cat = subset['prodID'].nunique()
+    total_fab = datastore.select("pdv", catID=catID, fabID=fabID)['prodID'].nunique()
+    score_sante = (total_fab / total_cat * 1000) if total_cat > 0 else 0
+    moyenne = subset.groupby('fabID')['prodID'].nunique().mean()
+    return score_sante, moyenne
+
+
 def render_score_sante_fabricant():
     """Score santé d'un fabricant dans une catégorie"""
-    produits, pdv = load_data()
-    if pdv is None:
+    if load_data("pdv") is None:
         return
 
     col1, col2 = st.columns(2)
 
     with col1:
-        listeCats = sorted(pdv['catID'].unique())
+        listeCats = datastore.distinct_values("pdv", 'catID')
         catID = st.selectbox("Catégorie", listeCats, key="cat_score")
 
     with col2:
-        listeFabs = sorted(pdv['fabID'].unique())
+        listeFabs = datastore.distinct_values("pdv", 'fabID')
         fabID = st.selectbox("Fabricant", listeFabs, key="fab_score")
 
-    subset = pdv[pdv['catID'] == catID]
-    total_cat = subset['prodID'].nunique()
-    total_fab = subset[subset['fabID'] == fabID]['prodID'].nunique()
-    score_sante = (total_fab / total_cat * 1000) if total_cat > 0 else 0
+    score_sante, moyenne = compute_score_sante(catID, fabID)
 
     # Gauge avec ECharts
     options = {
@@ -132,28 +128,26 @@ def render_score_sante_fabricant():
     st_echarts(options=options, height="400px")
 
     # Moyenne de produits par fabricant
-    moyenne = subset.groupby('fabID')['prodID'].nunique().mean()
     st.metric(f"Moyenne de produits de catégorie {catID} par fabricant", f"{moyenne:.1f}")
 
 
 def render_presence_marche():
     """Fabricants les plus présents sur le marché"""
-    produits, pdv = load_data()
-    if pdv is None:
+    if load_data("pdv") is None:
         return
 
     topN = st.slider("Nombre de fabricants à afficher", 5, 20, 10, step=5, key="top_market")
 
-    presence_fab = pdv.groupby('fabID')['magID'].nunique().nlargest(topN)
+    presence_fab = aggregates.top_distinct_counts('fabID', 'magID', topN)
 
-    options = {
-        "title": {"text": f"Top {topN} fabricants présents dans le plus de magasins"},
-        "tooltip": {"trigger": "item"},
-        "legend": {"orient": "vertical", "left": "left"},
-        "series": [{
-            "type": "pie",
+    options = chart_options.pie_options(
+        f"Top {topN} fabricants présents dans le plus de magasins",
+        presence_fab.index.to_numpy(),
+        presence_fab.to_numpy(),
+        name_dim='fabID',
+        value_dim='magasins',
+        series_style={
             "radius": "50%",
-            "data": [{"value": v, "name": str(k)} for k, v in presence_fab.items()],
             "emphasis": {
                 "itemStyle": {
                     "shadowBlur": 10,
@@ -161,19 +155,30 @@ def render_presence_marche():
                     "shadowColor": "rgba(0, 0, 0, 0.5)"
                 }
             }
-        }]
-    }
+        }
+    )
     st_echarts(options=options, height="500px")
 
 
+@result_cache.cached()
+def compute_disponibilite(fabID, magA, magB):
+    """Produits distincts du fabricant par catégorie dans les deux magasins (colonnes alignées)"""
+    prod_magA = datastore.select("pdv", fabID=fabID, magID=magA).groupby('catID')['prodID'].nunique()
+    prod_magB = datastore.select("pdv", fabID=fabID, magID=magB).groupby('catID')['prodID'].nunique()
+
+    return pd.DataFrame({
+        'Magasin A': prod_magA,
+        'Magasin B': prod_magB
+    }).fillna(0)
+
+
 def render_disponibilite_magasins():
     """Taux de disponibilité par magasin (Dumbbell chart)"""
-    produits, pdv = load_data()
-    if pdv is None:
+    if load_data("pdv") is None:
         return
 
-    listeMags = sorted(pdv['magID'].unique())
-    listeFabs = sorted(pdv['fabID'].unique())
+    listeMags = datastore.distinct_values("pdv", 'magID')
+    listeFabs = datastore.distinct_values("pdv", 'fabID')
 
     col1, col2, col3 = st.columns(3)
 
@@ -184,96 +189,61 @@ def render_disponibilite_magasins():
     with col3:
         fabID = st.selectbox("Fabricant", listeFabs, key="fab_dumbbell")
 
-    subset_fab = pdv[pdv['fabID'] == fabID]
-    prod_magA = subset_fab[subset_fab['magID'] == magA].groupby('catID')['prodID'].nunique()
-    prod_magB = subset_fab[subset_fab['magID'] == magB].groupby('catID')['prodID'].nunique()
-
-    df_dumbbell = pd.DataFrame({
-        'Magasin A': prod_magA,
-        'Magasin B': prod_magB
-    }).fillna(0)
-
-    categories = [str(cat) for cat in df_dumbbell.index]
-
-    series = []
-
-    # Lignes de connexion
-    for cat in df_dumbbell.index:
-        valA = int(df_dumbbell.loc[cat, 'Magasin A'])
-        valB = int(df_dumbbell.loc[cat, 'Magasin B'])
-        series.append({
-            "type": "line",
-            "lineStyle": {"color": "gray", "width": 2},
-            "symbol": "none",
-            "data": [[valA, str(cat)], [valB, str(cat)]]
-        })
-
-    # Points pour Magasin A
-    series.append({
-        "name": f"Magasin {magA}",
-        "type": "scatter",
-        "symbolSize": 12,
-        "itemStyle": {"color": "#5470c6"},
-        "data": [[int(df_dumbbell.loc[cat, 'Magasin A']), str(cat)] for cat in df_dumbbell.index]
-    })
-
-    # Points pour Magasin B
-    series.append({
-        "name": f"Magasin {magB}",
-        "type": "scatter",
-        "symbolSize": 12,
-        "itemStyle": {"color": "#91cc75"},
-        "data": [[int(df_dumbbell.loc[cat, 'Magasin B']), str(cat)] for cat in df_dumbbell.index]
-    })
-
-    options = {
-        "title": {"text": f"Disponibilité du fabricant {fabID} : {magA} vs {magB}"},
-        "tooltip": {"trigger": "item"},
-        "legend": {"data": [f"Magasin {magA}", f"Magasin {magB}"]},
-        "xAxis": {"type": "value", "name": "Nombre de produits disponibles"},
-        "yAxis": {"type": "category", "data": categories, "name": "Catégorie"},
-        "series": series
-    }
+    def build():
+        df_dumbbell = compute_disponibilite(fabID, magA, magB)
+        return chart_options.dumbbell_options(
+            f"Disponibilité du fabricant {fabID} : {magA} vs {magB}",
+            df_dumbbell.index.tolist(),
+            df_dumbbell['Magasin A'].to_numpy(),
+            df_dumbbell['Magasin B'].to_numpy(),
+            f"Magasin {magA}",
+            f"Magasin {magB}",
+            x_name="Nombre de produits disponibles",
+            y_name="Catégorie"
+        )
+
+    options = payloads.cached_options(("disponibilite", fabID, magA, magB), build)
 
     st_echarts(options=options, height="600px")
 
 
-def render_ratio_accords_produits():
-    """Ratio accords / produits par fabricant"""
-    produits, pdv = load_data()
-    if pdv is None:
-        return
-
-    listeCats = sorted(pdv['catID'].unique())
-    catID = st.selectbox("Catégorie", listeCats, key="cat_ratio")
-
-    # Sélection de période
-    col1, col2 = st.columns(2)
-    with col1:
-        date_debut = st.date_input("Date début", datetime.date(2022, 1, 1), key="debut_ratio")
-    with col2:
-        date_fin = st.date_input("Date fin", datetime.datetime.now().date(), key="fin_ratio")
-
-    subset_cat = pdv[pdv['catID'] == catID].copy()
-
-    # Filtrer par dates
-    start_date = pd.to_datetime(date_debut)
-    end_date = pd.to_datetime(date_fin) + pd.Timedelta(days=1)
-    subset_cat = subset_cat[(subset_cat['date'] >= start_date) & (subset_cat['date'] <= end_date)]
-
-    acc_per_fab = subset_cat.groupby('fabID')['prodID'].count().rename('nb_accords')
-    prods_per_fab = subset_cat.groupby('fabID')['prodID'].nunique().rename('nb_produits')
-
-    ratio_df = pd.concat([acc_per_fab, prods_per_fab], axis=1).fillna(0)
-    ratio_df['ratio'] = ratio_df.apply(
-        lambda r: r['nb_accords'] / r['nb_produits'] if r['nb_produits'] > 0 else 0,
-        axis=1
+def compute_ratio_accords(subset_cat, top=30):
+    """Accords, produits distincts et ratio par fabricant, les `top` meilleurs ratios en tête"""
+    grouped = subset_cat.groupby('fabID')['prodID'].agg(['count', 'nunique'])
+    nb_accords = grouped['count'].to_numpy()
+    nb_produits = grouped['nunique'].to_numpy()
+    ratio = np.divide(
+        nb_accords, nb_produits,
+        out=np.zeros(len(grouped)), where=nb_produits > 0
     )
-    ratio_df = ratio_df.sort_values('ratio', ascending=False).head(30).reset_index()
 
-    if ratio_df.empty:
-        st.warning("Pas de données pour cette catégorie / période.")
-        return
+    ratio_df = pd.DataFrame({
+        'nb_accords': nb_accords,
+        'nb_produits': nb_produits,
+        'ratio': ratio
+    }, index=grouped.index)
+    return ratio_df.sort_values('ratio', ascending=False).head(top).reset_index()
+
+
+def ratio_scatter_data(ratio_df, fab_labels):
+    """Points [ratio, rang, accords, fabricant, accords, produits] construits colonne par colonne"""
+    nb_accords = ratio_df['nb_accords'].tolist()
+    return [
+        list(point)
+        for point in zip(
+            ratio_df['ratio'].tolist(),
+            range(len(ratio_df)),
+            nb_accords,
+            fab_labels,
+            nb_accords,
+            ratio_df['nb_produits'].tolist(),
+        )
+    ]
+
+
+def ratio_options(catID, ratio_df):
+    """Options du nuage de bulles accords / produits"""
+    fab_labels = ratio_df['fabID'].astype(str).tolist()
 
     # Scatter plot avec bulles
     options = {
@@ -292,12 +262,12 @@ def render_ratio_accords_produits():
         "xAxis": {"type": "value", "name": "Ratio accords / produit"},
         "yAxis": {
             "type": "category",
-            "data": ratio_df['fabID'].astype(str).tolist(),
+            "data": fab_labels,
             "name": "Fabricant"
         },
         "visualMap": {
-            "min": ratio_df['ratio'].min(),
-            "max": ratio_df['ratio'].max(),
+            "min": float(ratio_df['ratio'].min()),
+            "max": float(ratio_df['ratio'].max()),
             "dimension": 0,
             "orient": "vertical",
             "right": 10,
@@ -313,42 +283,88 @@ def render_ratio_accords_produits():
                     return Math.sqrt(data[4]) * 2;
                 }
             """).js_code,
-            "data": [
-                [
-                    row['ratio'],
-                    idx,
-                    row['nb_accords'],
-                    str(row['fabID']),
-                    row['nb_accords'],
-                    row['nb_produits']
-                ]
-                for idx, row in ratio_df.iterrows()
-            ],
+            "data": ratio_scatter_data(ratio_df, fab_labels),
             "emphasis": {"focus": "self"}
         }]
     }
-    st_echarts(options=options, height="650px")
-def render_intensite_concurrentielle():
-    """Intensité concurrentielle par catégorie (HHI)"""
+    return options
+
+
+@result_cache.cached(end_arg="end_id")
+def compute_ratio_periode(catID, start_id, end_id):
+    """Ratio accords / produits de la catégorie entre deux dateID inclus"""
+    return compute_ratio_accords(datastore.select("pdv", catID=catID, date_range=(start_id, end_id)))
+
+
+def render_ratio_accords_produits():
+    """Ratio accords / produits par fabricant"""
+    if load_data("pdv") is None:
+        return
+
+    listeCats = datastore.distinct_values("pdv", 'catID')
+    catID = st.selectbox("Catégorie", listeCats, key="cat_ratio")
 
-    produits, pdv = load_data()
-    if pdv is None:
+    # Sélection de période
+    col1, col2 = st.columns(2)
+    with col1:
+        date_debut = st.date_input("Date début", datetime.date(2022, 1, 1), key="debut_ratio")
+    with col2:
+        date_fin = st.date_input("Date fin", datetime.datetime.now().date(), key="fin_ratio")
+
+    # Filtrer par dates (dateID entier AAAAMMJJ) : plage contiguë de la table triée par date
+    start_id = datastore.date_to_id(date_debut)
+    end_id = datastore.date_to_id(date_fin + datetime.timedelta(days=1))
+    ratio_df = compute_ratio_periode(catID, start_id, end_id)
+
+    if ratio_df.empty:
+        st.warning("Pas de données pour cette catégorie / période.")
         return
 
-    listeCats = sorted(pdv['catID'].unique())
-    catID = st.selectbox("Catégorie", listeCats, key="cat_hhi")
+    options = payloads.cached_options(
+        ("ratio_accords", catID, start_id, end_id),
+        lambda: ratio_options(catID, ratio_df)
+    )
+    st_echarts(options=options, height="650px")
+
 
-    subset_cat = pdv[pdv['catID'] == catID]
+@result_cache.cached()
+def compute_intensite(catID):
+    """Parts de marché (en produits distincts) des fabricants d'une catégorie et indice HHI
+
+    Retourne (None, 0) si la catégorie n'a aucun produit.
+    """
+    subset_cat = datastore.select("pdv", catID=catID)
     prod_counts_by_fab = subset_cat.groupby('fabID')['prodID'].nunique()
     total_products_cat = prod_counts_by_fab.sum()
 
     if total_products_cat == 0:
-        st.warning("Aucun produit enregistré pour cette catégorie.")
-        return
+        return None, 0
 
     market_share = prod_counts_by_fab / total_products_cat
     hhi = (market_share ** 2).sum()
 
+    ms_df = pd.DataFrame({
+        "share_frac": market_share.values,
+        "nb_products": prod_counts_by_fab.values
+    }, index=market_share.index.astype(str)).sort_values("share_frac", ascending=False).head(20)
+    return ms_df, hhi
+
+
+def render_intensite_concurrentielle():
+    """Intensité concurrentielle par catégorie (HHI)"""
+
+    if load_data("pdv") is None:
+        return
+
+    listeCats = datastore.distinct_values("pdv", 'catID')
+    catID = st.selectbox("Catégorie", listeCats, key="cat_hhi")
+
+    ms_df, hhi = compute_intensite(catID)
+
+    if ms_df is None:
+        st.warning("Aucun produit enregistré pour cette catégorie.")
+        return
+
     if hhi < 0.01:
         interp = "Concurrence faible"
     elif hhi < 0.03:
@@ -356,23 +372,18 @@ def render_intensite_concurrentielle():
     else:
         interp = "Concurrence élevée"
 
-    ms_df = pd.DataFrame({
-        "share_frac": market_share.values,
-        "nb_products": prod_counts_by_fab.values
-    }, index=market_share.index.astype(str)).sort_values("share_frac", ascending=False).head(20)
     st.write(ms_df)
 
     # Graphique ECharts
-    x_data = [str(x) for x in ms_df.index.tolist()]
-    y_data = [float(x) for x in ms_df['share_frac'].tolist()]
-
-    options = {
-        "title": {"text": f"Parts de marché - Catégorie {catID}"},
-        "tooltip": {"trigger": "axis", "axisPointer": {"type": "shadow"}},
-        "xAxis": {"type": "category", "data": x_data, "axisLabel": {"rotate": 45}},
-        "yAxis": {"type": "value", "name": "Part de marché"},
-        "series": [{"type": "bar", "data": y_data, "itemStyle": {"color": "#ee6666"}}]
-    }
+    options = chart_options.category_options(
+        f"Parts de marché - Catégorie {catID}",
+        ms_df.index.to_numpy(),
+        ms_df['share_frac'].to_numpy(),
+        label_dim='fabID',
+        value_dim='part',
+        value_name="Part de marché",
+        series_style={"itemStyle": {"color": "#ee6666"}}
+    )
     st_echarts(options=options, height="500px")
 
     col1, col2 = st.columns(2)
@@ -382,72 +393,102 @@ def render_intensite_concurrentielle():
         st.metric("Interprétation", interp)
 
 
+@result_cache.cached(sources=("produits",))
+def compute_fabricants_categorie(catID):
+    """Fabricants triés présents dans la catégorie du catalogue"""
+    return sorted(datastore.select("produits", catID=catID)['fabID'].unique().tolist())
+
+
+# Granularités de la croissance du catalogue : libellé de chaque période
+GRANULARITES_CROISSANCE = {
+    "M": "Mois",
+    "W": "Semaine",
+    "D": "Jour",
+}
+
+
+@result_cache.cached(sources=("produits",), end_arg="end_id")
+def compute_croissance(catID, fabID, start_id, end_id, granularite="M"):
+    """Nouveaux produits par période entre deux dateID, pour la catégorie ou un fabricant
+
+    Les périodes sont indexées par le dateID de leur premier jour.
+
+    Les produits vus avant la période ne sont pas nouveaux : la table des premières dates
+    matérialisée par `aggregates` couvre tout l'historique du périmètre.
+    """
+    filters = {"catID": catID}
+    if fabID is not None:
+        filters["fabID"] = fabID
+    first_seen_period = aggregates.new_product_counts(filters, start_id, end_id, granularite, name="produits")
+
+    return pd.DataFrame({
+        'period': first_seen_period.index,
+        'nouv_prod': first_seen_period.values
+    })
+
+
 def render_croissance_catalogue():
-    """Croissance du catalogue (nouveaux produits mensuels)"""
-    produits, pdv = load_data()
-    if produits is None:
+    """Croissance du catalogue (nouveaux produits par mois, semaine ou jour)"""
+    if load_data("produits") is None:
         return
 
     col1, col2 = st.columns(2)
 
     with col1:
-        listeCats = sorted(produits['catID'].unique())
+        listeCats = datastore.distinct_values("produits", 'catID')
         catID = st.selectbox("Catégorie", listeCats, key="cat_growth")
 
     with col2:
         growth_scope = st.radio("Vue", ("Toute la catégorie", "Par fabricant"), key="scope_growth")
 
-    prods_scope = produits[produits['catID'] == catID].copy()
+    first_id, last_id = datastore.date_extent("produits")
+    col1, col2 = st.columns(2)
+    with col1:
+        date_debut = st.date_input("Date début", datastore.id_to_date(first_id), key="debut_growth")
+    with col2:
+        date_fin = st.date_input("Date fin", datastore.id_to_date(last_id), key="fin_growth")
+    start_id = datastore.date_to_id(date_debut)
+    end_id = datastore.date_to_id(date_fin)
 
+    fabID = None
     if growth_scope == "Par fabricant":
-        listeFabs = sorted(prods_scope['fabID'].unique())
+        listeFabs = compute_fabricants_categorie(catID)
         fabID = st.selectbox("Fabricant", listeFabs, key="fab_growth")
-        prods_scope = prods_scope[prods_scope['fabID'] == fabID]
-
-    if 'date' in prods_scope.columns:
-        first_seen = prods_scope.groupby('prodID')['date'].min().dropna()
-        first_seen_month = first_seen.dt.to_period('M').value_counts().sort_index()
-
-        idx = pd.to_datetime(first_seen_month.index.to_timestamp())
-        df_growth = pd.DataFrame({
-            'month': idx,
-            'nouv_prod': first_seen_month.values
-        }).sort_values('month')
-
-        if df_growth.empty:
-            st.warning("Pas assez de données temporelles.")
-            return
-
-        # Convertir en format pour ECharts
-        months_str = df_growth['month'].dt.strftime('%Y-%m').tolist()
-
-        options = {
-            "title": {"text": f"Nouveaux produits par mois - {growth_scope} (cat {catID})"},
-            "tooltip": {"trigger": "axis"},
-            "xAxis": {
-                "type": "category",
-                "data": months_str,
-                "axisLabel": {"rotate": 45}
-            },
-            "yAxis": {"type": "value", "name": "Nouveaux produits"},
-            "series": [{
-                "data": df_growth['nouv_prod'].values.tolist(),
-                "type": "line",
-                "smooth": True,
-                "itemStyle": {"color": "#73c0de"},
-                "areaStyle": {"opacity": 0.3}
-            }]
-        }
-        st_echarts(options=options, height="500px")
-
-
-# Dictionnaire des visualisations disponibles
-BOARD_FABRICANTS_DEMOS = {
-    "Top Magasins par Catégorie": render_top_magasins_categorie,
-    "Score Santé Fabricant": render_score_sante_fabricant,
-    "Présence sur le Marché": render_presence_marche,
-    "Disponibilité Magasins": render_disponibilite_magasins,
-    "Ratio Accords/Produits": render_ratio_accords_produits,
-    "Intensité Concurrentielle": render_intensite_concurrentielle,
-    "Croissance Catalogue": render_croissance_catalogue
-}
\ No newline at end of file
+
+    col1, col2 = st.columns(2)
+    with col1:
+        granularite = st.radio("Granularité", list(GRANULARITES_CROISSANCE), key="gran_growth",
+                               format_func=GRANULARITES_CROISSANCE.get)
+    with col2:
+        mode = st.selectbox("Échantillonnage", list(downsampling.MODES),
+                            format_func=downsampling.MODES.get, key="mode_growth")
+
+    df_growth = compute_croissance(catID, fabID, start_id, end_id, granularite)
+
+    if df_growth.empty:
+        st.warning("Pas assez de données temporelles.")
+        return
+
+    # Le zoom renvoyé par le graphique recentre le budget de points sur la fenêtre visible
+    zoom = st.session_state.get("zoom_growth")
+    x = datastore.ids_to_epoch_ms(df_growth['period'].to_numpy())
+    x, y = downsampling.downsample_window(
+        x, df_growth['nouv_prod'].to_numpy(), downsampling.point_budget(), mode,
+        window=downsampling.zoom_window(x, zoom)
+    )
+
+    options = chart_options.time_series_options(
+        f"Nouveaux produits par {GRANULARITES_CROISSANCE[granularite].lower()} - {growth_scope} (cat {catID})",
+        x,
+        y,
+        value_dim='nouv_prod',
+        value_name="Nouveaux produits",
+        series_style={
+            "smooth": True,
+            "itemStyle": {"color": "#73c0de"},
+            "areaStyle": {"opacity": 0.3}
+        },
+        zoom=zoom
+    )
+    st_echarts(options=options, height="500px",
+               events={"datazoom": chart_options.DATAZOOM_EVENT}, key="zoom_growth")
@@ -0,0 +1,84 @@
+import pandas as pd
+
+
+# Au-delà de quelques milliers de liens, la disposition Sankey d'ECharts devient inutilisable
+MAX_LINKS = 2000
+
+# Préfixe des nœuds par dimension : rend les noms uniques d'un niveau à l'autre
+DIMENSION_LABELS = {
+    'magID': "Magasin",
+    'catID': "Cat",
+    'fabID': "Fab",
+    'prodID': "Produit",
+}
+
+
+def _level_links(df, source, target, weight, value_col):
+    """Liens entre deux niveaux adjacents, pondérés par valeurs distinctes ou par lignes"""
+    grouped = df.groupby([source, target], sort=False)
+    if weight == "distinct":
+        values = grouped[value_col].nunique()
+    else:
+        values = grouped.size()
+    return values.rename('value').reset_index()
+
+
+def _node_weights(level_links, dims):
+    """Poids de chaque nœud par niveau : max du flux entrant et du flux sortant"""
+    weights = []
+    for i, dim in enumerate(dims):
+        flows = []
+        if i > 0:
+            flows.append(level_links[i - 1].groupby(dim)['value'].sum())
+        if i < len(level_links):
+            flows.append(level_links[i].groupby(dim)['value'].sum())
+        weights.append(pd.concat(flows, axis=1).max(axis=1))
+    return weights
+
+
+def _allocate(counts, budget):
+    """Répartit `budget` nœuds entre les niveaux ; un niveau plus petit que sa part cède le reste"""
+    allocation = [0] * len(counts)
+    remaining = budget
+    order = sorted(range(len(counts)), key=lambda i: counts[i])
+    for done, i in enumerate(order):
+        share = max(1, remaining // (len(counts) - done))
+        allocation[i] = min(counts[i], share)
+        remaining -= allocation[i]
+    return allocation
+
+
+def compute_flows(df, dims, weight="distinct", value_col='prodID', max_nodes=100, max_links=MAX_LINKS):
+    """Liens (source, cible, valeur) entre niveaux successifs de `dims`
+
+    `weight` vaut "distinct" (nombre de `value_col` distincts) ou "rows" (nombre de lignes).
+    Chaque niveau conserve ses nœuds les plus lourds dans la limite de `max_nodes` au total ;
+    les liens dont une extrémité est élaguée disparaissent, puis on ne garde que les
+    `max_links` liens les plus lourds (None pour ne pas plafonner).
+    """
+    if len(dims) < 2:
+        return []
+
+    level_links = [
+        _level_links(df, dims[i], dims[i + 1], weight, value_col)
+        for i in range(len(dims) - 1)
+    ]
+    weights = _node_weights(level_links, dims)
+    allocation = _allocate([len(w) for w in weights], max(max_nodes, len(dims)))
+    kept = [w.nlargest(n).index for w, n in zip(weights, allocation)]
+
+    frames = []
+    for i, links in enumerate(level_links):
+        source, target = dims[i], dims[i + 1]
+        links = links[links[source].isin(kept[i]) & links[target].isin(kept[i + 1])]
+        frames.append(pd.DataFrame({
+            'source': DIMENSION_LABELS.get(source, source) + " " + links[source].astype(str),
+            'target': DIMENSION_LABELS.get(target, target) + " " + links[target].astype(str),
+            'value': links['value'],
+        }))
+
+    result = pd.concat(frames, ignore_index=True)
+    if max_links is not None and len(result) > max_links:
+        result = result.nlargest(max_links, 'value').sort_index()
+
+    return list(zip(result['source'].tolist(), result['target'].tolist(), result['value'].tolist()))
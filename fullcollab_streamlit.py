@@ -2,239 +2,376 @@ import pandas as pd
 from streamlit_echarts import st_echarts
 import streamlit as st
 
+import aggregates
+import chart_options
+import datastore
+import downsampling
+import flows
+import payloads
+import result_cache
+import sketches
+import streaming
 
-# Variable globale pour stocker les données
-_cached_df = None
 
+def load_data(name='pdv', need_rows=False):
+    """Retourne le jeu de données partagé des points de vente
 
-def load_data(file_path='./data/pointsDeVente-tous.csv'):
-    """Charge les données du fichier CSV"""
-    global _cached_df
-    if _cached_df is not None:
-        return _cached_df
-    
+    Une source trop volumineuse pour la mémoire est résumée par blocs : son résumé est retourné
+    à la place des lignes, et les vues qui ont besoin des lignes (`need_rows`) sont indisponibles.
+    """
     try:
-        df = pd.read_csv(file_path)
-        df['date'] = pd.to_datetime(df['dateID'].astype(str), format='%Y%m%d')
-        _cached_df = df
-        return df
+        # Extraits ajoutés par le processus d'ingestion : repris sans redémarrage
+        if datastore.should_stream(name):
+            streaming.refresh(name)
+            summary = streaming.load(name)
+            if need_rows:
+                st.error("Source résumée par blocs (export trop volumineux) : cette vue a besoin des lignes")
+                return None
+            return summary
+        datastore.refresh(name)
+        return datastore.get_dataset(name)
     except Exception as e:
         st.error(f"Erreur lors du chargement: {e}")
         return None
 
 
+def approx_mode(key):
+    """Case à cocher du comptage approché, avec la marge d'erreur quand il est actif"""
+    approx = st.checkbox("Comptage approché (HyperLogLog)", key=key)
+    if approx:
+        st.caption(
+            "Estimation par fusion de sketches par (dimension, jour) : "
+            f"± {2 * sketches.relative_error():.1%} à 95 %"
+        )
+    return approx
+
+
+def approx_tooltip(approx, axis_pointer=None):
+    """Infobulle avec marge d'erreur en mode approché, infobulle par défaut sinon"""
+    if not approx:
+        return None
+    return chart_options.approx_tooltip(sketches.relative_error(), axis_pointer=axis_pointer)
+
+
 def render_produits_par_categorie():
     """Graphique: Nombre de produits uniques par catégorie"""
-    df = load_data()
-    if df is None:
+    if load_data() is None:
         return
     
-    produits_uniques = df.groupby('catID')['produit ID'].nunique()
-    
-    options = {
-        "title": {"text": "Nombre de produits uniques par catégorie"},
-        "tooltip": {"trigger": "axis", "axisPointer": {"type": "shadow"}},
-        "xAxis": {
-            "type": "category",
-            "data": [str(x) for x in produits_uniques.index.tolist()],
-            "axisLabel": {"rotate": 45}
-        },
-        "yAxis": {"type": "value", "name": "Nombre de produits"},
-        "series": [{
-            "data": produits_uniques.values.tolist(),
-            "type": "bar",
-            "itemStyle": {"color": "#5470c6"}
-        }]
-    }
+    approx = approx_mode("approx_prod_cat")
+    if approx:
+        produits_uniques = aggregates.approx_distinct_counts('catID', 'prodID')
+    else:
+        produits_uniques = aggregates.distinct_counts('catID', 'prodID')
+    
+    options = chart_options.category_options(
+        "Nombre de produits uniques par catégorie",
+        produits_uniques.index.to_numpy(),
+        produits_uniques.to_numpy(),
+        label_dim='catID',
+        value_dim='produits',
+        value_name="Nombre de produits",
+        series_style={"itemStyle": {"color": "#5470c6"}},
+        tooltip=approx_tooltip(approx, axis_pointer="shadow")
+    )
     st_echarts(options=options, height="500px")
 
 
 def render_produits_par_fabricant():
     """Graphique: Top fabricants par nombre de produits uniques"""
-    df = load_data()
-    if df is None:
+    if load_data() is None:
         return
     
     top_n = st.slider("Nombre de fabricants à afficher", 5, 50, 20)
-    produits_uniques = df.groupby('fabID')['produit ID'].nunique().nlargest(top_n)
-    
-    options = {
-        "title": {"text": f"Top {top_n} Fabricants par nombre de produits uniques"},
-        "tooltip": {"trigger": "axis", "axisPointer": {"type": "shadow"}},
-        "xAxis": {
-            "type": "category",
-            "data": [str(x) for x in produits_uniques.index.tolist()],
-            "axisLabel": {"rotate": 45}
-        },
-        "yAxis": {"type": "value", "name": "Nombre de produits"},
-        "series": [{
-            "data": produits_uniques.values.tolist(),
-            "type": "bar",
-            "itemStyle": {"color": "#91cc75"}
-        }]
-    }
+    approx = approx_mode("approx_prod_fab")
+    if approx:
+        produits_uniques = aggregates.approx_top_distinct_counts('fabID', 'prodID', top_n)
+    else:
+        produits_uniques = aggregates.top_distinct_counts('fabID', 'prodID', top_n)
+    
+    options = chart_options.category_options(
+        f"Top {top_n} Fabricants par nombre de produits uniques",
+        produits_uniques.index.to_numpy(),
+        produits_uniques.to_numpy(),
+        label_dim='fabID',
+        value_dim='produits',
+        value_name="Nombre de produits",
+        series_style={"itemStyle": {"color": "#91cc75"}},
+        tooltip=approx_tooltip(approx, axis_pointer="shadow")
+    )
     st_echarts(options=options, height="500px")
 
 
 def render_magasins_par_categorie():
     """Graphique: Nombre de magasins uniques par catégorie"""
-    df = load_data()
-    if df is None:
+    if load_data() is None:
         return
     
-    magasins_uniques = df.groupby('catID')['magID'].nunique()
-    
-    options = {
-        "title": {"text": "Nombre de magasins distincts par catégorie"},
-        "tooltip": {"trigger": "axis", "axisPointer": {"type": "shadow"}},
-        "xAxis": {
-            "type": "category",
-            "data": [str(x) for x in magasins_uniques.index.tolist()],
-            "axisLabel": {"rotate": 45}
-        },
-        "yAxis": {"type": "value", "name": "Nombre de magasins"},
-        "series": [{
-            "data": magasins_uniques.values.tolist(),
-            "type": "bar",
-            "itemStyle": {"color": "#fac858"}
-        }]
-    }
+    approx = approx_mode("approx_mag_cat")
+    if approx:
+        magasins_uniques = aggregates.approx_distinct_counts('catID', 'magID')
+    else:
+        magasins_uniques = aggregates.distinct_counts('catID', 'magID')
+    
+    options = chart_options.category_options(
+        "Nombre de magasins distincts par catégorie",
+        magasins_uniques.index.to_numpy(),
+        magasins_uniques.to_numpy(),
+        label_dim='catID',
+        value_dim='magasins',
+        value_name="Nombre de magasins",
+        series_style={"itemStyle": {"color": "#fac858"}},
+        tooltip=approx_tooltip(approx, axis_pointer="shadow")
+    )
     st_echarts(options=options, height="500px")
 
 
 def render_magasins_par_fabricant():
     """Graphique: Top fabricants par nombre de magasins uniques"""
-    df = load_data()
-    if df is None:
+    if load_data() is None:
         return
     
     top_n = st.slider("Nombre de fabricants à afficher", 5, 50, 20)
-    magasins_uniques = df.groupby('fabID')['magID'].nunique().nlargest(top_n)
-    
-    options = {
-        "title": {"text": f"Top {top_n} Fabricants par nombre de magasins distincts"},
-        "tooltip": {"trigger": "axis", "axisPointer": {"type": "shadow"}},
-        "xAxis": {
-            "type": "category",
-            "data": [str(x) for x in magasins_uniques.index.tolist()],
-            "axisLabel": {"rotate": 45}
-        },
-        "yAxis": {"type": "value", "name": "Nombre de magasins"},
-        "series": [{
-            "data": magasins_uniques.values.tolist(),
-            "type": "bar",
-            "itemStyle": {"color": "#ee6666"}
-        }]
-    }
+    approx = approx_mode("approx_mag_fab")
+    if approx:
+        magasins_uniques = aggregates.approx_top_distinct_counts('fabID', 'magID', top_n)
+    else:
+        magasins_uniques = aggregates.top_distinct_counts('fabID', 'magID', top_n)
+    
+    options = chart_options.category_options(
+        f"Top {top_n} Fabricants par nombre de magasins distincts",
+        magasins_uniques.index.to_numpy(),
+        magasins_uniques.to_numpy(),
+        label_dim='fabID',
+        value_dim='magasins',
+        value_name="Nombre de magasins",
+        series_style={"itemStyle": {"color": "#ee6666"}},
+        tooltip=approx_tooltip(approx, axis_pointer="shadow")
+    )
     st_echarts(options=options, height="500px")
 
 
+# Granularités des séries temporelles : libellé et regroupement d'un dateID AAAAMMJJ
+GRANULARITES = {
+    "M": "Mois",
+    "D": "Jour",
+}
+
+
+@result_cache.cached(end_arg="end_id")
+def compute_produits_par_periode(start_id, end_id, granularite="M", approx=False):
+    """Produits uniques par période entre deux dateID inclus, indexés par le dateID du début de période"""
+    if approx:
+        # Fusion des sketches (catégorie, jour) par période : aucune ligne relue
+        by = "month" if granularite == "M" else "day"
+        return aggregates.sketch('catID', 'prodID').estimate(start_id, end_id, by=by).round().astype('int64')
+    
+    # Paires (jour, produit) distinctes de la plage : aucune ligne relue
+    return aggregates.period_distinct_counts('prodID', start_id, end_id, granularite)
+
+
 def render_tendance_produits_mensuelle():
     """Graphique: Tendance du nombre de produits uniques par mois"""
-    df = load_data()
-    if df is None:
+    if load_data() is None:
         return
     
-    produits_par_mois = df.groupby(df['date'].dt.to_period('M'))['produit ID'].nunique()
-    
-    options = {
-        "title": {"text": "Tendance du nombre de produits uniques par mois"},
-        "tooltip": {"trigger": "axis"},
-        "xAxis": {
-            "type": "category",
-            "data": [str(x) for x in produits_par_mois.index.tolist()],
-            "axisLabel": {"rotate": 45}
-        },
-        "yAxis": {"type": "value", "name": "Nombre de produits"},
-        "series": [{
-            "data": produits_par_mois.values.tolist(),
-            "type": "line",
-            "smooth": True,
-            "itemStyle": {"color": "#73c0de"},
-            "areaStyle": {"opacity": 0.3}
-        }],
-        "grid": {"containLabel": True}
+    first_id, last_id = datastore.date_extent('pdv')
+    col1, col2 = st.columns(2)
+    with col1:
+        date_debut = st.date_input("Date début", datastore.id_to_date(first_id))
+    with col2:
+        date_fin = st.date_input("Date fin", datastore.id_to_date(last_id))
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        granularite = st.radio("Granularité", list(GRANULARITES), format_func=GRANULARITES.get)
+    with col2:
+        mode = st.selectbox("Échantillonnage", list(downsampling.MODES), format_func=downsampling.MODES.get)
+        zoom_serveur = st.checkbox("Zoom côté serveur (fenêtre visible seulement)")
+    approx = approx_mode("approx_tendance")
+    
+    start_id, end_id = datastore.date_to_id(date_debut), datastore.date_to_id(date_fin)
+    series_style = {
+        "smooth": True,
+        "itemStyle": {"color": "#73c0de"},
+        "areaStyle": {"opacity": 0.3}
     }
-    st_echarts(options=options, height="500px")
+    title = f"Tendance du nombre de produits uniques par {GRANULARITES[granularite].lower()}"
+    
+    # Le zoom renvoyé par le graphique recentre le budget de points sur la fenêtre visible
+    zoom = st.session_state.get("zoom_tendance")
+    
+    if zoom_serveur:
+        # Seule la fenêtre visible est agrégée (tranche de la table triée par date) et envoyée
+        budget = downsampling.point_budget()
+        if zoom is None:
+            # Ouverture sur les `budget` dernières périodes quand la plage en compte davantage
+            jours = (date_fin - date_debut).days + 1
+            periodes = jours if granularite == "D" else jours / 30.44
+            if periodes > budget:
+                zoom = [100 * (1 - budget / periodes), 100]
+        extent = datastore.ids_to_epoch_ms([start_id, end_id])
+        window = downsampling.zoom_window(extent, zoom)
+        window_ids = (start_id, end_id)
+        if window is not None:
+            lo, hi = datastore.epoch_ms_to_id(window[0]), datastore.epoch_ms_to_id(window[1])
+            # Bords élargis aux périodes entières : pas de mois partiel présenté comme complet
+            window_ids = (
+                max(start_id, int(datastore.period_start_ids([lo], granularite)[0])),
+                min(end_id, datastore.period_end_id(hi, granularite)),
+            )
+        visible = compute_produits_par_periode(*window_ids, granularite, approx)
+        # Fenêtre plus longue que le budget (dézoom complet) : échantillonnée selon le mode choisi
+        visible = downsampling.downsample(datastore.ids_to_epoch_ms(visible.index), visible.to_numpy(), budget, mode)
+        # Aperçu mensuel de toute la période pour l'ombre du curseur
+        apercu = compute_produits_par_periode(start_id, end_id, "M", approx)
+        options = chart_options.windowed_time_series_options(
+            title,
+            visible,
+            (datastore.ids_to_epoch_ms(apercu.index), apercu.to_numpy()),
+            extent,
+            value_dim='produits',
+            value_name="Nombre de produits",
+            series_style=series_style,
+            zoom=zoom,
+            grid={"containLabel": True},
+            tooltip=approx_tooltip(approx)
+        )
+        st_echarts(options=options, height="500px",
+                   events={"datazoom": chart_options.DATAZOOM_EVENT}, key="zoom_tendance")
+        return
+    
+    produits_par_periode = compute_produits_par_periode(start_id, end_id, granularite, approx)
+    x = datastore.ids_to_epoch_ms(produits_par_periode.index)
+    x, y = downsampling.downsample_window(
+        x, produits_par_periode.to_numpy(), downsampling.point_budget(), mode,
+        window=downsampling.zoom_window(x, zoom)
+    )
+    
+    options = chart_options.time_series_options(
+        title,
+        x,
+        y,
+        value_dim='produits',
+        value_name="Nombre de produits",
+        series_style=series_style,
+        zoom=zoom,
+        grid={"containLabel": True},
+        tooltip=approx_tooltip(approx)
+    )
+    st_echarts(options=options, height="500px",
+               events={"datazoom": chart_options.DATAZOOM_EVENT}, key="zoom_tendance")
+
+
+def compute_sankey_links(df, top_n_cat, top_n_fab):
+    """Liens Magasin -> Catégorie -> Fournisseur pondérés par le nombre de produits uniques
+
+    Trois agrégations groupées quel que soit le nombre de magasins et de catégories : produits
+    par (magasin, catégorie), classement des catégories, puis produits par (catégorie, fournisseur).
+    """
+    top_categories = df.groupby('catID')['prodID'].nunique().nlargest(top_n_cat)
+    rank = pd.Series(range(len(top_categories)), index=top_categories.index)
+    df_top = df[df['catID'].isin(top_categories.index)]
+
+    mag_cat = df_top.groupby(['magID', 'catID'])['prodID'].nunique().rename('value').reset_index()
+    mag_cat = mag_cat.assign(rank=mag_cat['catID'].map(rank)).sort_values(['magID', 'rank'], kind='stable')
+
+    # Meilleurs fournisseurs de chaque catégorie : tri stable puis head, comme nlargest par groupe
+    cat_fab = df_top.groupby(['catID', 'fabID'])['prodID'].nunique().rename('value').reset_index()
+    cat_fab = (
+        cat_fab.assign(rank=cat_fab['catID'].map(rank))
+        .sort_values(['rank', 'value'], ascending=[True, False], kind='stable')
+        .groupby('catID', sort=False).head(top_n_fab)
+    )
+
+    links = [
+        (f"Magasin {mag}", f"Cat {cat}", value)
+        for mag, cat, value in zip(
+            mag_cat['magID'].tolist(), mag_cat['catID'].tolist(), mag_cat['value'].tolist()
+        )
+    ]
+    links += [
+        (f"Cat {cat}", f"Fab {fab}", value)
+        for cat, fab, value in zip(
+            cat_fab['catID'].tolist(), cat_fab['fabID'].tolist(), cat_fab['value'].tolist()
+        )
+    ]
+    return links
+
+
+@result_cache.cached()
+def compute_sankey(magIDs, top_n_cat, top_n_fab):
+    """Liens Sankey pour un tuple de magasins"""
+    return compute_sankey_links(datastore.select('pdv', magID=list(magIDs)), top_n_cat, top_n_fab)
+
+
+@result_cache.cached()
+def compute_flux(dims, weight, max_nodes):
+    """Liens du flux multi-niveaux pour un tuple de dimensions"""
+    return flows.compute_flows(datastore.get_dataset('pdv'), list(dims), weight=weight, max_nodes=max_nodes)
 
 
 def render_sankey_diagram():
     """Diagramme Sankey: Flux Magasin -> Catégories -> Fournisseurs"""
-    df = load_data()
-    if df is None:
+    if load_data(need_rows=True) is None:
         return
     
-    # Sélectionner le magasin par défaut (le plus fréquent)
-    mag_counts = df['magID'].value_counts()
-    default_magID = mag_counts.index[0]
+    # Magasins classés par fréquence, le plus fréquent sélectionné par défaut
+    mag_counts = aggregates.row_counts('magID')
     
-    # Permettre à l'utilisateur de choisir le magasin
-    selected_magID = st.selectbox(
-        "Sélectionner un magasin",
-        options=mag_counts.head(10).index.tolist(),
-        index=0
+    # Permettre à l'utilisateur de choisir un ou plusieurs magasins
+    selected_magIDs = st.multiselect(
+        "Sélectionner des magasins",
+        options=mag_counts.index.tolist(),
+        default=mag_counts.index[:1].tolist()
     )
+    if not selected_magIDs:
+        st.warning("Sélectionner au moins un magasin.")
+        return
     
-    df_mag = df[df['magID'] == selected_magID]
-    
-    # Top catégories pour ce magasin
-    top_n_cat = st.slider("Nombre de catégories à afficher", 3, 15, 10)
-    top_categories = df_mag.groupby('catID')['produit ID'].nunique().nlargest(top_n_cat)
-    
-    # Construire les nœuds et liens
-    nodes = []
-    links = []
-    
-    # Ajouter le nœud du magasin
-    nodes.append({"name": f"Magasin {selected_magID}"})
-    
-    # Ajouter les catégories et leurs liens
-    for cat_id, num_products in top_categories.items():
-        cat_name = f"Cat {cat_id}"
-        nodes.append({"name": cat_name})
-        links.append({
-            "source": f"Magasin {selected_magID}",
-            "target": cat_name,
-            "value": num_products
-        })
-        
-        # Ajouter les fournisseurs pour cette catégorie
-        df_cat = df_mag[df_mag['catID'] == cat_id]
-        top_suppliers = df_cat.groupby('fabID')['produit ID'].nunique().nlargest(5)
-        
-        for fab_id, num_prod_fab in top_suppliers.items():
-            fab_name = f"Fab {fab_id}"
-            if {"name": fab_name} not in nodes:
-                nodes.append({"name": fab_name})
-            links.append({
-                "source": cat_name,
-                "target": fab_name,
-                "value": num_prod_fab
-            })
-    
-    options = {
-        "title": {
-            "text": f"Flux: Magasin {selected_magID} → Catégories → Fournisseurs",
-            "subtext": "Basé sur le nombre de produits uniques"
-        },
-        "tooltip": {"trigger": "item", "triggerOn": "mousemove"},
-        "series": [{
-            "type": "sankey",
-            "data": nodes,
-            "links": links,
-            "emphasis": {"focus": "adjacency"},
-            "lineStyle": {"color": "gradient", "curveness": 0.5}
-        }]
-    }
+    nb_categories = len(datastore.distinct_values('pdv', 'catID'))
+    top_n_cat = st.slider("Nombre de catégories à afficher", 1, nb_categories, min(10, nb_categories))
+    top_n_fab = st.slider("Nombre de fournisseurs par catégorie", 1, 20, 5)
+    
+    magasins = ", ".join(str(m) for m in selected_magIDs)
+    options = payloads.cached_options(
+        ("sankey", tuple(selected_magIDs), top_n_cat, top_n_fab),
+        lambda: chart_options.sankey_options(
+            f"Flux: Magasin {magasins} → Catégories → Fournisseurs",
+            "Basé sur le nombre de produits uniques",
+            compute_sankey(tuple(selected_magIDs), top_n_cat, top_n_fab)
+        )
+    )
     st_echarts(options=options, height="700px")
 
 
-# Dictionnaire des visualisations disponibles
-FULLCOLLAB_DEMOS = {
-    "Produits par Catégorie": render_produits_par_categorie,
-    "Produits par Fabricant": render_produits_par_fabricant,
-    "Magasins par Catégorie": render_magasins_par_categorie,
-    "Magasins par Fabricant": render_magasins_par_fabricant,
-    "Tendance Mensuelle": render_tendance_produits_mensuelle,
-    "Diagramme Sankey": render_sankey_diagram
-}
\ No newline at end of file
+def render_flux_multi_niveaux():
+    """Diagramme Sankey: flux sur une hiérarchie de dimensions choisie"""
+    if load_data(need_rows=True) is None:
+        return
+    
+    dims = st.multiselect(
+        "Niveaux du flux (dans l'ordre)",
+        options=list(flows.DIMENSION_LABELS.keys()),
+        default=['magID', 'catID', 'fabID'],
+        format_func=flows.DIMENSION_LABELS.get
+    )
+    if len(dims) < 2:
+        st.warning("Sélectionner au moins deux niveaux.")
+        return
+    
+    weight = st.radio("Poids des liens", ("distinct", "rows"),
+                      format_func={"distinct": "Produits uniques", "rows": "Lignes"}.get)
+    max_nodes = st.slider("Nombre maximal de nœuds", 10, 500, 100)
+    
+    def build():
+        links = compute_flux(tuple(dims), weight, max_nodes)
+        niveaux = " → ".join(flows.DIMENSION_LABELS[d] for d in dims)
+        return chart_options.sankey_options(
+            f"Flux: {niveaux}",
+            f"{len(links)} liens, {max_nodes} nœuds au plus",
+            links
+        )
+    
+    options = payloads.cached_options(("flux", tuple(dims), weight, max_nodes), build)
+    st_echarts(options=options, height="700px")
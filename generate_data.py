@@ -0,0 +1,255 @@
+"""Générateur de jeux de données synthétiques au format des points de vente
+
+Reproduit le schéma de data/pointsDeVente-tous.csv (dateID, produit ID, catID, fabID, magID)
+et ses rapports de cardinalité à l'échelle voulue :
+
+- chaque produit a une seule date d'apparition, une catégorie et un fabricant, et occupe
+  entre 1 et 99 lignes (≈ 50 en moyenne) réparties sur des magasins tirés avec remise ;
+- un fabricant pour ≈ 3,2 produits, couvrant ≈ 2 catégories ;
+- identifiants de produits croissants avec des trous (≈ 4,9 fois le nombre de produits) ;
+- 10 catégories et 100 magasins par défaut, volume très variable d'un jour à l'autre.
+
+`skew` est l'exposant de Zipf appliqué à la popularité des catégories, fabricants et
+magasins (0 : uniforme). Les lignes sont produites par blocs, triées par date, et écrites au
+fil de l'eau en CSV et/ou en Parquet / Feather : la mémoire reste bornée par la taille
+d'un bloc, quelle que soit l'échelle. Un catalogue au format produits-tous.csv est écrit
+à côté.
+
+    python generate_data.py --rows 10_000_000 --formats csv,parquet --out ./data/synthetic
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+import datastore
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    import pyarrow.parquet as parquet
+except ImportError:  # pyarrow absent : CSV uniquement, écrit par pandas
+    pa = None
+
+
+# Rapports observés sur data/pointsDeVente-tous.csv
+ROWS_PER_PRODUCT = (1, 99)
+PRODUCTS_PER_FABRICANT = 3.2
+PRODUCT_ID_GAP = (1, 9)
+CATEGORIES_PER_FABRICANT = (1, 5)
+
+# Colonnes des points de vente : en-tête du CSV d'origine, puis noms canoniques
+PDV_HEADER = ['dateID', 'produit ID', 'catID', 'fabID', 'magID']
+PDV_COLUMNS = datastore.SOURCES["pdv"]["names"]
+
+FORMATS = ("csv", "parquet", "feather")
+
+
+def zipf_weights(n, skew):
+    """Probabilités ∝ 1 / rang^skew, dans un ordre aléatoire fixé par l'appelant"""
+    weights = 1.0 / np.arange(1, n + 1, dtype=np.float64) ** skew
+    return weights / weights.sum()
+
+
+def column_types(n_products, n_fabricants, n_categories, n_stores):
+    """Types de SCHEMA, élargis pour les identifiants maximaux de cette échelle"""
+    maxima = {
+        'dateID': 99991231,
+        'prodID': n_products * PRODUCT_ID_GAP[1],
+        'catID': n_categories - 1,
+        'fabID': n_fabricants - 1,
+        'magID': n_stores - 1,
+    }
+    return {
+        col: datastore._narrow(np.array([0, maxima[col]]), dtype)
+        for col, dtype in datastore.SCHEMA.items()
+    }
+
+
+class CsvSink:
+    """Écriture d'un CSV par blocs (pyarrow si disponible, sinon pandas)"""
+
+    def __init__(self, path, header, sep):
+        self.path, self.header, self.sep = path, header, sep
+        self._file = open(path, "wb")
+        self._first = True
+
+    def write(self, df):
+        if self._first and self.header is not None:
+            # En-tête sans guillemets, comme le fichier d'origine
+            self._file.write((self.sep.join(self.header) + "\n").encode())
+        self._first = False
+        if pa is not None:
+            options = pa_csv.WriteOptions(include_header=False, delimiter=self.sep, quoting_style="none")
+            pa_csv.write_csv(pa.Table.from_pandas(df, preserve_index=False), self._file, options)
+        else:
+            self._file.write(df.to_csv(sep=self.sep, index=False, header=False).encode())
+
+    def close(self):
+        self._file.close()
+
+
+class ParquetSink:
+    """Écriture d'un fichier Parquet, un groupe de lignes par bloc"""
+
+    def __init__(self, path, schema):
+        self.path = path
+        self._writer = parquet.ParquetWriter(path, schema)
+        self._schema = schema
+
+    def write(self, df):
+        self._writer.write_table(pa.Table.from_pandas(df, schema=self._schema, preserve_index=False))
+
+    def close(self):
+        self._writer.close()
+
+
+class FeatherSink:
+    """Écriture d'un fichier Feather (Arrow IPC), un lot d'enregistrements par bloc"""
+
+    def __init__(self, path, schema):
+        self.path = path
+        self._writer = pa.ipc.new_file(path, schema)
+        self._schema = schema
+
+    def write(self, df):
+        self._writer.write_table(pa.Table.from_pandas(df, schema=self._schema, preserve_index=False))
+
+    def close(self):
+        self._writer.close()
+
+
+def _open_sinks(out_dir, tag, formats, types):
+    """Fichiers de sortie : ({format: sink} des points de vente, sink CSV du catalogue)"""
+    if pa is None and set(formats) - {"csv"}:
+        raise RuntimeError("pyarrow est requis pour les formats Parquet et Feather")
+    os.makedirs(out_dir, exist_ok=True)
+    base = os.path.join(out_dir, f"pointsDeVente-{tag}")
+
+    sinks = {}
+    if pa is not None:
+        schema = pa.schema([(col, pa.from_numpy_dtype(np.dtype(types[col]))) for col in PDV_COLUMNS])
+    for fmt in formats:
+        if fmt == "csv":
+            sinks[fmt] = CsvSink(f"{base}.csv", PDV_HEADER, datastore.SOURCES["pdv"]["sep"])
+        elif fmt == "parquet":
+            sinks[fmt] = ParquetSink(f"{base}.parquet", schema)
+        else:
+            sinks[fmt] = FeatherSink(f"{base}.feather", schema)
+
+    catalog = CsvSink(os.path.join(out_dir, f"produits-{tag}.csv"), None, datastore.SOURCES["produits"]["sep"])
+    return sinks, catalog
+
+
+def generate(rows, out_dir, formats=("csv",), skew=0.3, n_categories=10, n_stores=100,
+             start="2022-01-01", days=380, chunk_rows=2_000_000, seed=0, verbose=True):
+    """Écrit `rows` lignes synthétiques dans `out_dir` ; retourne {format: chemin}"""
+    rng = np.random.default_rng(seed)
+
+    mean_rows = sum(ROWS_PER_PRODUCT) / 2
+    # Lignes par produit, tirées d'avance (1 octet par produit) pour tomber juste sur `rows`
+    counts = rng.integers(*ROWS_PER_PRODUCT, int(rows / mean_rows * 1.05) + 10, dtype=np.uint8, endpoint=True)
+    cumulative = np.cumsum(counts, dtype=np.int64)
+    n_products = int(np.searchsorted(cumulative, rows, side="left")) + 1
+    counts = counts[:n_products]
+    counts[-1] -= cumulative[n_products - 1] - rows
+    del cumulative
+
+    n_fabricants = max(1, int(round(n_products / PRODUCTS_PER_FABRICANT)))
+    types = column_types(n_products, n_fabricants, n_categories, n_stores)
+
+    # Popularités : rangs de Zipf attribués aléatoirement aux identifiants
+    cat_p = zipf_weights(n_categories, skew)[rng.permutation(n_categories)]
+    fab_p = zipf_weights(n_fabricants, skew)[rng.permutation(n_fabricants)]
+    store_p = zipf_weights(n_stores, skew)[rng.permutation(n_stores)]
+
+    # Catégories couvertes par chaque fabricant (la première est la principale)
+    fab_cats = rng.choice(n_categories, size=(n_fabricants, CATEGORIES_PER_FABRICANT[1]), p=cat_p)
+    fab_ncats = rng.integers(CATEGORIES_PER_FABRICANT[0], CATEGORIES_PER_FABRICANT[1] + 1, n_fabricants)
+
+    # Nombre de produits apparus chaque jour : volume journalier très inégal
+    dates = pd.date_range(start, periods=days, freq="D")
+    date_ids = (dates.year * 10000 + dates.month * 100 + dates.day).to_numpy()
+    day_weights = rng.gamma(1.0, size=days)
+    per_day = rng.multinomial(n_products, day_weights / day_weights.sum())
+    product_dates = np.repeat(date_ids, per_day)
+
+    sinks, catalog = _open_sinks(out_dir, f"{rows}", formats, types)
+    written = 0
+    next_id = 0
+    products_per_chunk = max(1, int(chunk_rows // mean_rows))
+    start_time = time.perf_counter()
+    try:
+        for first in range(0, n_products, products_per_chunk):
+            n = min(products_per_chunk, n_products - first)
+
+            prod_ids = next_id + np.cumsum(rng.integers(*PRODUCT_ID_GAP, n, endpoint=True))
+            next_id = int(prod_ids[-1])
+            fab_ids = rng.choice(n_fabricants, size=n, p=fab_p)
+            cat_ids = fab_cats[fab_ids, rng.integers(0, fab_ncats[fab_ids])]
+            day_ids = product_dates[first:first + n]
+
+            products = pd.DataFrame({
+                'dateID': day_ids.astype(types['dateID']),
+                'prodID': prod_ids.astype(types['prodID']),
+                'catID': cat_ids.astype(types['catID']),
+                'fabID': fab_ids.astype(types['fabID']),
+            })
+            catalog.write(products)
+
+            chunk = products.loc[products.index.repeat(counts[first:first + n])].reset_index(drop=True)
+            chunk['magID'] = rng.choice(n_stores, size=len(chunk), p=store_p).astype(types['magID'])
+            for sink in sinks.values():
+                sink.write(chunk)
+
+            written += len(chunk)
+            if verbose:
+                elapsed = time.perf_counter() - start_time
+                print(f"{written:>14,} / {rows:,} lignes  ({written / elapsed:,.0f} lignes/s)", file=sys.stderr)
+    finally:
+        for sink in [*sinks.values(), catalog]:
+            sink.close()
+
+    return {fmt: sink.path for fmt, sink in sinks.items()} | {"produits": catalog.path}
+
+
+def _parse_rows(text):
+    """Accepte 10_000_000, 10M, 1G ou 1B"""
+    text = text.strip().upper().replace("_", "")
+    factor = {"K": 10**3, "M": 10**6, "G": 10**9, "B": 10**9}.get(text[-1:], 1)
+    return int(float(text[:-1] if factor > 1 else text) * factor)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Génère un jeu de points de vente synthétique")
+    parser.add_argument("--rows", type=_parse_rows, default=10_000_000, help="nombre de lignes (10M, 1B...)")
+    parser.add_argument("--out", default="./data/synthetic")
+    parser.add_argument("--formats", default="csv", help=f"parmi {', '.join(FORMATS)}, séparés par des virgules")
+    parser.add_argument("--skew", type=float, default=0.3, help="exposant de Zipf des popularités (0 : uniforme)")
+    parser.add_argument("--categories", type=int, default=10)
+    parser.add_argument("--stores", type=int, default=100)
+    parser.add_argument("--start", default="2022-01-01", help="premier jour")
+    parser.add_argument("--days", type=int, default=380)
+    parser.add_argument("--chunk-rows", type=_parse_rows, default=2_000_000, help="lignes par bloc écrit")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    formats = [fmt.strip() for fmt in args.formats.split(",") if fmt.strip()]
+    unknown = set(formats) - set(FORMATS)
+    if unknown:
+        parser.error(f"format inconnu : {', '.join(sorted(unknown))}")
+
+    paths = generate(
+        args.rows, args.out, formats, skew=args.skew, n_categories=args.categories,
+        n_stores=args.stores, start=args.start, days=args.days,
+        chunk_rows=args.chunk_rows, seed=args.seed,
+    )
+    for fmt, path in paths.items():
+        print(f"{fmt}: {path} ({os.path.getsize(path) / 1e6:.1f} Mo)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""Ingestion incrémentale des extraits quotidiens de points de vente
+
+Les fichiers CSV déposés dans DROP_DIR (même format que pointsDeVente-tous.csv) sont ajoutés à
+la table chargée et au cache Feather, puis déplacés dans DROP_DIR/processed. Les tables de
+`aggregates`, les index et les sketches sont mis à jour au lieu d'être recalculés, et seuls les
+résultats mémoïsés qui couvrent les nouvelles dates sont invalidés.
+
+    python ingest.py            # traite les fichiers en attente puis s'arrête
+    python ingest.py --watch    # surveille le répertoire
+
+Un fichier n'est pris qu'une fois stable (non modifié depuis SETTLE_SECONDS) : le plus sûr est
+de le copier sous un autre nom (extrait.csv.part) puis de le renommer. Un extrait déjà ingéré
+(même SHA-1) est rangé sans être ajouté une seconde fois.
+
+Le tableau de bord (app.py) lance la surveillance une fois par processus avec `start_watcher()`,
+et `python ingest.py --watch` peut la tenir à part. Un verrou sur DROP_DIR garantit qu'un seul
+processus ingère à la fois : les autres workers ne font que reprendre le cache mis à jour
+(`datastore.refresh`, `streaming.refresh`), et les pages elles-mêmes n'ingèrent jamais.
+"""
+import argparse
+import contextlib
+import glob
+import logging
+import os
+import shutil
+import threading
+import time
+
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:  # Windows : pas de verrou entre processus, un seul ingesteur à lancer
+    fcntl = None
+
+import aggregates
+import datastore
+import payloads
+import result_cache
+import streaming
+
+
+DROP_DIR = "./data/drop"
+PROCESSED_DIR = os.path.join(DROP_DIR, "processed")
+LOCK_PATH = os.path.join(DROP_DIR, ".ingest.lock")
+POLL_SECONDS = 60
+# Délai sans modification au-delà duquel un fichier déposé est considéré comme complet
+SETTLE_SECONDS = 5
+
+logger = logging.getLogger(__name__)
+
+_watcher = None
+_watcher_lock = threading.Lock()
+_history = []
+
+
+def _settled(path, now):
+    """Vrai si le fichier n'a pas été modifié depuis SETTLE_SECONDS (copie terminée)"""
+    try:
+        return now - os.stat(path).st_mtime >= SETTLE_SECONDS
+    except OSError:
+        return False
+
+
+@contextlib.contextmanager
+def _exclusive():
+    """Verrou non bloquant entre processus : vrai si ce processus est seul à ingérer"""
+    if fcntl is None:
+        yield True
+        return
+    os.makedirs(DROP_DIR, exist_ok=True)
+    # Le verrou est libéré à la fermeture du fichier, y compris si le processus meurt
+    with open(LOCK_PATH, "w") as f:
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            acquired = True
+        except BlockingIOError:
+            acquired = False
+        yield acquired
+
+
+def pending_files():
+    """Extraits complets en attente, par ordre de nom (les noms datés arrivent dans l'ordre chronologique)"""
+    now = time.time()
+    return [path for path in sorted(glob.glob(os.path.join(DROP_DIR, "*.csv"))) if _settled(path, now)]
+
+
+def read_extract(path, name="pdv"):
+    """Lit un extrait avec les colonnes canoniques et le schéma compact de la source `name`"""
+    spec = dict(datastore.SOURCES[name], path=path)
+    return datastore._read_csv(spec)
+
+
+def ingest_file(path, name="pdv"):
+    """Ajoute un extrait à la source `name` et met à jour tout ce qui en dépend ; retourne un rapport"""
+    start = time.perf_counter()
+    report = {"file": os.path.basename(path)}
+    sha1 = datastore._file_hash(path)
+    # Extraits ajoutés entre-temps par un autre processus : repris avant d'ajouter celui-ci
+    if datastore.should_stream(name):
+        streaming.refresh(name)
+        streaming.load(name)
+    else:
+        datastore.refresh(name)
+    if sha1 in datastore.ingested_hashes(name):
+        report.update(rows=0, skipped="déjà ingéré", seconds=time.perf_counter() - start)
+        return report
+
+    rows = read_extract(path, name)
+    report["rows"] = len(rows)
+    if len(rows):
+        if datastore.should_stream(name):
+            # Source résumée par blocs : l'extrait est réduit dans le résumé, qui republie ses tables
+            old_version, version = streaming.append_rows(name, rows, report["file"], sha1)
+        else:
+            old_version, version = datastore.append_rows(name, rows, report["file"], sha1)
+            aggregates.apply_append(name, old_version, rows)
+        first_new_date = int(rows['dateID'].min())
+        result_cache.rebase(name, old_version, version, first_new_date)
+        payloads.discard_version(old_version)
+        report.update(dates=(first_new_date, int(rows['dateID'].max())), version=version)
+    report["seconds"] = time.perf_counter() - start
+    return report
+
+
+def poll(name="pdv"):
+    """Ingère les extraits en attente puis les range dans PROCESSED_DIR ; retourne leurs rapports"""
+    reports = []
+    with _exclusive() as alone:
+        if not alone:
+            # Un autre processus ingère : ses ajouts arriveront par le cache
+            return reports
+        for path in pending_files():
+            try:
+                report = ingest_file(path, name)
+            except (OSError, ValueError, KeyError, pd.errors.ParserError) as e:
+                # Extrait illisible ou incomplet : il reste en place et sera retenté au prochain passage
+                reports.append({"file": os.path.basename(path), "error": str(e)})
+                continue
+            os.makedirs(PROCESSED_DIR, exist_ok=True)
+            shutil.move(path, os.path.join(PROCESSED_DIR, os.path.basename(path)))
+            reports.append(report)
+    _history.extend(reports)
+    return reports
+
+
+def history():
+    """Rapports de toutes les ingestions du processus"""
+    return list(_history)
+
+
+def _watch(name, interval):
+    while True:
+        try:
+            poll(name)
+        except Exception as e:
+            # Une erreur imprévue (rangement impossible, etc.) ne doit pas arrêter la surveillance
+            logger.exception("Échec de l'ingestion dans %s", DROP_DIR)
+            _history.append({"error": f"{type(e).__name__}: {e}"})
+        time.sleep(interval)
+
+
+def start_watcher(name="pdv", interval=POLL_SECONDS):
+    """Lance (une seule fois par processus) la surveillance de DROP_DIR dans un thread démon"""
+    global _watcher
+    with _watcher_lock:
+        if _watcher is None:
+            _watcher = threading.Thread(target=_watch, args=(name, interval), name="ingest", daemon=True)
+            _watcher.start()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ingestion des extraits déposés dans " + DROP_DIR)
+    parser.add_argument("--watch", action="store_true", help="surveille le répertoire au lieu de s'arrêter")
+    parser.add_argument("--interval", type=float, default=POLL_SECONDS)
+    args = parser.parse_args()
+
+    while True:
+        for report in poll():
+            print(report)
+        if not args.watch:
+            break
+        time.sleep(args.interval)
@@ -0,0 +1,48 @@
+import threading
+import time
+
+import datastore
+from result_cache import ResultCache
+
+
+# Options ECharts déjà construites, communes à toutes les sessions
+PAYLOAD_CACHE = ResultCache(max_entries=256, max_bytes=64 * 1024 * 1024)
+
+_stats = {"builds": 0, "seconds": 0.0}
+_stats_lock = threading.Lock()
+
+
+def cached_options(key, build, sources=("pdv",)):
+    """Options du graphique `key`, construites par `build()` une seule fois par version des sources
+
+    Le dictionnaire est renvoyé tel quel aux appels suivants, sans reconstruction ; il est
+    partagé entre les sessions et ne doit pas être modifié.
+    """
+    versions = tuple(datastore.dataset_version(source) for source in sources)
+    full_key = (key, versions)
+
+    options = PAYLOAD_CACHE.get(full_key)
+    if options is None:
+        start = time.perf_counter()
+        options = build()
+        elapsed = time.perf_counter() - start
+
+        with _stats_lock:
+            _stats["builds"] += 1
+            _stats["seconds"] += elapsed
+
+        PAYLOAD_CACHE.put(full_key, options)
+    return options
+
+
+def discard_version(version):
+    """Oublie les options construites sur une version de source remplacée"""
+    PAYLOAD_CACHE.rekey(lambda key: None if version in key[1] else key)
+
+
+def payload_stats():
+    """Constructions effectuées et leur temps cumulé, plus les compteurs du cache"""
+    with _stats_lock:
+        stats = dict(_stats)
+    stats["cache"] = PAYLOAD_CACHE.stats()
+    return stats
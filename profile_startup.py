@@ -0,0 +1,243 @@
+"""Profil du démarrage à froid du tableau de bord
+
+Exécute le registre de démos de app.py sans interface et chronomètre chaque étape : imports,
+chargement des données (`load_data` de chaque module) et premier rendu de chaque démo.
+
+    python profile_startup.py [--json FICHIER] [--folded FICHIER] [--trend FICHIER]
+
+Le rapport JSON garde l'arbre des étapes, le fichier « folded » (une pile par ligne,
+durée propre en microsecondes) s'ouvre avec flamegraph.pl ou speedscope, et chaque
+exécution ajoute une ligne au fichier de tendance.
+"""
+import argparse
+import contextlib
+import datetime
+import functools
+import json
+import logging
+import os
+import platform
+import sys
+import time
+
+
+PROFILE_DIR = "./data/.profile"
+
+# Dépendances tierces importées avant les modules du projet, dans l'ordre de app.py
+THIRD_PARTY = ["numpy", "pandas", "pyarrow", "streamlit", "streamlit_echarts"]
+
+# Fonctions chronométrées à l'intérieur des étapes : (module, attribut, libellé)
+INSTRUMENTED = [
+    ("datastore", "_read_csv", "lecture CSV"),
+    ("datastore", "_read_cache", "lecture Feather"),
+    ("datastore", "ids_to_epoch_ms", "conversion dates"),
+    ("datastore", "id_to_date", "conversion dates"),
+    ("datastore", "date_to_id", "conversion dates"),
+]
+
+
+class Profiler:
+    """Arbre d'étapes chronométrées ; chaque nœud vaut {'name', 'seconds', 'calls', 'children'}"""
+
+    def __init__(self):
+        self.root = {"name": "startup", "seconds": 0.0, "calls": 1, "children": []}
+        self._stack = [self.root]
+
+    def _child(self, name):
+        parent = self._stack[-1]
+        for node in parent["children"]:
+            if node["name"] == name:
+                return node
+        node = {"name": name, "seconds": 0.0, "calls": 0, "children": []}
+        parent["children"].append(node)
+        return node
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        """Chronomètre le bloc comme sous-étape de l'étape courante (cumulée si déjà vue)"""
+        node = self._child(name)
+        self._stack.append(node)
+        start = time.perf_counter()
+        try:
+            yield node
+        finally:
+            node["seconds"] += time.perf_counter() - start
+            node["calls"] += 1
+            self._stack.pop()
+
+    def instrument(self, module, attr, label):
+        """Remplace `module.attr` par une version chronométrée sous l'étape `label`"""
+        func = getattr(module, attr)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            # Pas d'étape imbriquée quand la fonction s'appelle elle-même indirectement
+            if self._stack[-1]["name"] == label:
+                return func(*args, **kwargs)
+            with self.stage(label):
+                return func(*args, **kwargs)
+
+        setattr(module, attr, wrapper)
+
+    def finish(self, seconds):
+        self.root["seconds"] = seconds
+
+    def folded(self):
+        """Lignes « a;b;c durée_propre_en_µs », format attendu par les outils de flame graph"""
+        lines = []
+
+        def walk(node, prefix):
+            path = f"{prefix};{node['name']}" if prefix else node["name"]
+            own = node["seconds"] - sum(child["seconds"] for child in node["children"])
+            if own > 0:
+                lines.append(f"{path} {round(own * 1e6)}")
+            for child in node["children"]:
+                walk(child, path)
+
+        walk(self.root, "")
+        return lines
+
+    def totals(self, depth=1):
+        """Durée des étapes jusqu'à `depth` niveaux : {'imports;pandas': secondes, ...}"""
+        totals = {}
+
+        def walk(node, prefix, level):
+            for child in node["children"]:
+                path = f"{prefix};{child['name']}" if prefix else child["name"]
+                totals[path] = child["seconds"]
+                if level < depth:
+                    walk(child, path, level + 1)
+
+        walk(self.root, "", 1)
+        return totals
+
+
+def capture_charts(module, sink):
+    """Remplace st_echarts dans `module` : les options sont mesurées au lieu d'être affichées"""
+    def st_echarts(options, **kwargs):
+        sink.append(len(json.dumps(options, default=lambda o: getattr(o, "js_code", str(o)))))
+
+    module.st_echarts = st_echarts
+
+
+def run(profiler):
+    """Déroule le démarrage : imports, load_data puis premier rendu de chaque démo"""
+    errors = {}
+    charts = {}
+
+    with profiler.stage("imports"):
+        for name in THIRD_PARTY:
+            with profiler.stage(name):
+                try:
+                    __import__(name)
+                except ImportError as e:
+                    errors[f"imports;{name}"] = str(e)
+
+        with profiler.stage("demo_registry"):
+            import demo_registry
+        with profiler.stage("datastore"):
+            import datastore
+
+        for module_path in dict.fromkeys(path for path, _ in demo_registry.DEMOS.values()):
+            with profiler.stage(module_path):
+                demo_registry.import_module(module_path)
+
+    import streamlit as st
+
+    # Les erreurs affichées par les démos sont relevées dans le rapport
+    current = {"stage": None}
+    st.error = lambda message, **kwargs: errors.setdefault(current["stage"], str(message))
+
+    for module_name, attr, label in INSTRUMENTED:
+        profiler.instrument(sys.modules[module_name], attr, label)
+
+    modules = {path: sys.modules[path] for path, _ in demo_registry.DEMOS.values()}
+    with profiler.stage("load_data"):
+        for module_path, module in modules.items():
+            current["stage"] = f"load_data;{module_path}"
+            with profiler.stage(module_path):
+                module.load_data()
+
+    with profiler.stage("render"):
+        for name, (module_path, function_name) in demo_registry.DEMOS.items():
+            sizes = []
+            capture_charts(modules[module_path], sizes)
+            current["stage"] = f"render;{name}"
+            with profiler.stage(name):
+                try:
+                    getattr(modules[module_path], function_name)()
+                except Exception as e:
+                    errors[current["stage"]] = f"{type(e).__name__}: {e}"
+            charts[name] = sizes
+
+    return {
+        "errors": errors,
+        "charts": charts,
+        "import_times": demo_registry.import_times(),
+        "datasets": datastore.memory_report(),
+    }
+
+
+def append_trend(path, entry):
+    """Ajoute `entry` au fichier de tendance et retourne l'entrée précédente (None si première)"""
+    previous = None
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            lines = [line for line in f if line.strip()]
+        if lines:
+            previous = json.loads(lines[-1])
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(entry, sort_keys=True) + "\n")
+    return previous
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Profil du démarrage à froid du tableau de bord")
+    parser.add_argument("--json", default=os.path.join(PROFILE_DIR, "startup.json"))
+    parser.add_argument("--folded", default=os.path.join(PROFILE_DIR, "startup.folded"))
+    parser.add_argument("--trend", default=os.path.join(PROFILE_DIR, "trend.jsonl"))
+    args = parser.parse_args(argv)
+
+    # Hors de `streamlit run`, Streamlit signale chaque appel sans contexte de session
+    logging.disable(logging.WARNING)
+
+    profiler = Profiler()
+    start = time.perf_counter()
+    details = run(profiler)
+    profiler.finish(time.perf_counter() - start)
+
+    report = {
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "seconds": profiler.root["seconds"],
+        "stages": profiler.root["children"],
+        **details,
+    }
+
+    for path in (args.json, args.folded, args.trend):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(args.json, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, default=str)
+    with open(args.folded, "w", encoding="utf-8") as f:
+        f.write("\n".join(profiler.folded()) + "\n")
+
+    totals = profiler.totals(depth=3)
+    previous = append_trend(args.trend, {
+        "timestamp": report["timestamp"],
+        "seconds": report["seconds"],
+        "stages": totals,
+        "errors": len(details["errors"]),
+    })
+
+    print(f"Démarrage complet : {report['seconds'] * 1000:.0f} ms")
+    for path, seconds in totals.items():
+        line = f"{'  ' * path.count(';')}{path.rsplit(';', 1)[-1]:<32} {seconds * 1000:9.1f} ms"
+        if previous and path in previous["stages"]:
+            line += f"  ({(seconds - previous['stages'][path]) * 1000:+.1f})"
+        print(line)
+    for stage, message in details["errors"].items():
+        print(f"erreur {stage} : {message}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+import functools
+import inspect
+import sys
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+import datastore
+
+
+def estimate_size(value):
+    """Taille approximative d'un résultat en octets"""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, (pd.Series, pd.Index)):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, np.ndarray):
+        return int(value.nbytes)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(
+            estimate_size(k) + estimate_size(v) for k, v in value.items()
+        )
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return sys.getsizeof(value) + sum(estimate_size(v) for v in value)
+    return sys.getsizeof(value)
+
+
+class ResultCache:
+    """Cache LRU partagé par toutes les sessions, borné en nombre d'entrées et en octets"""
+
+    def __init__(self, max_entries=512, max_bytes=128 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value, size=None):
+        size = estimate_size(value) if size is None else size
+        if size > self.max_bytes:
+            # Un résultat plus gros que tout le budget n'est pas conservé
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+            self._entries[key] = (value, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def rekey(self, func):
+        """Applique `func(clé)` à chaque entrée : nouvelle clé, ou None pour l'oublier"""
+        with self._lock:
+            entries = OrderedDict()
+            for key, (value, size) in self._entries.items():
+                new_key = func(key)
+                if new_key is None:
+                    self._bytes -= size
+                else:
+                    entries[new_key] = (value, size)
+            self._entries = entries
+
+    def stats(self):
+        """Compteurs du cache : succès, échecs, évictions, entrées et octets occupés"""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+            }
+
+
+# Cache des calculs des démos, commun à toutes les sessions du processus
+RESULT_CACHE = ResultCache()
+
+_MISSING = object()
+
+# Fonctions mémoïsées : {nom: (sources, signature, argument de fin de période ou None)}
+_functions = {}
+
+
+def cached(sources=("pdv",), cache=None, end_arg=None):
+    """Mémoïse une fonction de calcul sur (nom, arguments, versions des sources utilisées)
+
+    Les arguments doivent être hachables et le résultat ne doit pas être modifié par l'appelant,
+    puisqu'il est partagé entre les sessions. `end_arg` nomme l'argument dateID de fin quand le
+    résultat ne dépend que des lignes jusqu'à cette date : il survit alors aux ajouts postérieurs.
+    """
+    def decorator(func):
+        name = f"{func.__module__}.{func.__qualname__}"
+        _functions[name] = (tuple(sources), inspect.signature(func), end_arg)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            target = RESULT_CACHE if cache is None else cache
+            versions = tuple(datastore.dataset_version(source) for source in sources)
+            key = (name, args, tuple(sorted(kwargs.items())), versions)
+            result = target.get(key, _MISSING)
+            if result is _MISSING:
+                result = func(*args, **kwargs)
+                target.put(key, result)
+            return result
+
+        return wrapper
+
+    return decorator
+
+
+def _end_date(name, args, kwargs):
+    """Valeur de l'argument de fin de période d'un appel mémoïsé, ou None"""
+    _, signature, end_arg = _functions[name]
+    if end_arg is None:
+        return None
+    bound = signature.bind(*args, **dict(kwargs))
+    bound.apply_defaults()
+    return bound.arguments[end_arg]
+
+
+def rebase(source, old_version, new_version, first_new_date, cache=None):
+    """Reporte les résultats encore valides après un ajout de lignes datées à partir de `first_new_date`
+
+    Les résultats bornés avant ces dates passent à la nouvelle version de la source ; les autres
+    résultats calculés sur l'ancienne version sont oubliés.
+    """
+    def rekey(key):
+        name, args, kwargs, versions = key
+        sources = _functions[name][0]
+        if source not in sources or versions[sources.index(source)] != old_version:
+            return key
+        end = _end_date(name, args, kwargs)
+        if end is None or end >= first_new_date:
+            return None
+        versions = tuple(new_version if s == source else v for s, v in zip(sources, versions))
+        return name, args, kwargs, versions
+
+    (RESULT_CACHE if cache is None else cache).rekey(rekey)
@@ -0,0 +1,403 @@
+"""Résumé par blocs des exports de points de vente trop volumineux pour la mémoire
+
+Au-delà de `datastore.STREAM_ABOVE_BYTES`, le CSV n'est pas chargé : il est lu par blocs de
+`chunk_rows` lignes et chaque bloc est aussitôt réduit dans les tables dont les démos ont
+besoin, puis libéré :
+
+- paires (dimension, valeur) distinctes, d'où les comptages distincts par dimension ;
+- paires (jour, produit) distinctes, d'où les produits uniques par jour ou par mois ;
+- comptages de lignes, sketches HyperLogLog et valeurs de chaque dimension.
+
+La mémoire reste bornée par un bloc plus ces tables, dont la taille dépend du nombre de
+paires distinctes et non du nombre de lignes ; les réductions de blocs en attente de fusion
+n'y ajoutent jamais plus que la taille des tables. Le pic mesuré pendant la lecture (tracemalloc)
+est rapporté par `datastore.memory_report()`. Les vues qui ont besoin des lignes elles-mêmes
+(Sankey, flux, diagnostics) restent indisponibles pour une telle source.
+
+Le résumé est enregistré dans `datastore.CACHE_DIR` avec la liste des extraits ajoutés
+(ingest.py), et réécrit après chacun : un redémarrage le reprend sans relire le CSV ni perdre
+ces extraits, tant que le CSV de base n'a pas changé.
+
+    python streaming.py [CHEMIN] [--chunk-rows N]
+"""
+import argparse
+import hashlib
+import json
+import os
+import threading
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+import aggregates
+import datastore
+import sketches
+
+
+CHUNK_ROWS = 1_000_000
+
+# Tables tenues à jour bloc par bloc : celles que lisent les démos de fullcollab_streamlit
+DISTINCT_PAIRS = [("catID", "prodID"), ("fabID", "prodID"), ("catID", "magID"), ("fabID", "magID")]
+PERIOD_TARGETS = ["prodID"]
+ROW_COUNTS = ["magID"]
+# Un sketch par paire : la case « Comptage approché » des démos les lit toutes
+SKETCHES = DISTINCT_PAIRS
+VALUE_DIMS = ["catID", "fabID", "magID"]
+
+# Sources résumées : {nom: {'summary', 'sha1', 'ingested', 'stats'}}
+_summaries = {}
+_lock = threading.Lock()
+
+
+class _HashingReader:
+    """Fichier binaire dont les octets lus alimentent un SHA-1 : l'empreinte est calculée pendant la lecture"""
+
+    def __init__(self, f):
+        self._file = f
+        self.digest = hashlib.sha1()
+
+    def read(self, size=-1):
+        data = self._file.read(size)
+        self.digest.update(data)
+        return data
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        line = self._file.readline()
+        if not line:
+            raise StopIteration
+        self.digest.update(line)
+        return line
+
+
+class StreamSummary:
+    """Tables d'une source, complétées bloc par bloc sans conserver les lignes"""
+
+    def __init__(self, precision=sketches.DEFAULT_PRECISION):
+        self.rows = 0
+        self.extent = None
+        self.pairs = {pair: np.empty(0, dtype=np.int64) for pair in DISTINCT_PAIRS}
+        self.day_pairs = {target: np.empty(0, dtype=np.int64) for target in PERIOD_TARGETS}
+        self.row_counts = {dim: pd.Series(dtype='int64') for dim in ROW_COUNTS}
+        self.sketches = {pair: sketches.DistinctSketches(precision) for pair in SKETCHES}
+        self.values = {dim: np.empty(0, dtype=np.int64) for dim in VALUE_DIMS}
+        self.precision = precision
+        # Réductions des blocs pas encore fusionnées : {(table, clé): [codes ou sketches]}
+        self._pending = {}
+
+    @property
+    def nbytes(self):
+        return (
+            sum(codes.nbytes for codes in self.pairs.values())
+            + sum(codes.nbytes for codes in self.day_pairs.values())
+            + sum(sketch.nbytes for sketch in self.sketches.values())
+            + sum(int(counts.memory_usage()) for counts in self.row_counts.values())
+            + sum(part.nbytes for parts in self._pending.values() for part in parts)
+        )
+
+    def _defer(self, table, key, part):
+        """Met de côté la réduction d'un bloc, fusionnée dès que l'attente pèse autant que la table
+
+        Une fusion coûte au plus deux fois ce qui attendait : le coût total reste proportionnel
+        à la somme des blocs au lieu de re-trier toute la table à chaque bloc.
+        """
+        parts = self._pending.setdefault((table, key), [])
+        parts.append(part)
+        if sum(p.nbytes for p in parts) >= getattr(self, table)[key].nbytes:
+            self._flush(table, key)
+
+    def _flush(self, table, key):
+        parts = self._pending.pop((table, key), None)
+        if not parts:
+            return
+        tables = getattr(self, table)
+        if table == "sketches":
+            # Nouveau sketch plutôt qu'une fusion sur place : celui publié reste lisible
+            merged = sketches.DistinctSketches(self.precision)
+            merged.merge(tables[key], *parts)
+            tables[key] = merged
+        else:
+            tables[key] = aggregates.union_codes(tables[key], *parts)
+
+    def compact(self):
+        """Fusionne les réductions en attente dans les tables"""
+        for table, key in list(self._pending):
+            self._flush(table, key)
+
+    def add(self, chunk):
+        """Réduit un bloc de lignes (colonnes canoniques) dans les tables"""
+        if len(chunk) == 0:
+            return
+        dates = chunk['dateID'].to_numpy()
+        lo, hi = int(dates.min()), int(dates.max())
+        self.extent = (lo, hi) if self.extent is None else (min(self.extent[0], lo), max(self.extent[1], hi))
+
+        for dim, target in DISTINCT_PAIRS:
+            self._defer("pairs", (dim, target), aggregates.pair_codes(chunk[dim], chunk[target]))
+        for target in PERIOD_TARGETS:
+            self._defer("day_pairs", target, aggregates.pair_codes(dates, chunk[target]))
+        for dim, counts in self.row_counts.items():
+            self.row_counts[dim] = counts.add(chunk[dim].value_counts(), fill_value=0).astype('int64')
+        for dim, target in SKETCHES:
+            part = sketches.DistinctSketches(self.precision)
+            part.add(chunk[dim].to_numpy(), dates, chunk[target].to_numpy())
+            self._defer("sketches", (dim, target), part)
+        for dim in VALUE_DIMS:
+            self._defer("values", dim, aggregates.union_codes(chunk[dim].to_numpy()))
+        self.rows += len(chunk)
+
+    def tables(self):
+        """Tables au format de `aggregates` : {clé: table}"""
+        self.compact()
+        tables = {}
+        for (dim, target), codes in self.pairs.items():
+            by_key = aggregates.counts_from_pairs(codes, dim, target)
+            tables[dim, target] = (by_key, by_key.sort_values(ascending=False, kind='stable'))
+        for target, codes in self.day_pairs.items():
+            tables["day_pairs", target] = codes
+        for dim, counts in self.row_counts.items():
+            counts = counts.rename_axis(dim).rename('count')
+            tables[dim, None] = counts.sort_values(ascending=False, kind='stable')
+        for (dim, target), sketch in self.sketches.items():
+            tables["sketch", dim, target, sketch.precision] = sketch
+        return tables
+
+    def arrays(self):
+        """Tables sous forme de tableaux nommés, pour `np.savez` ; inverse de `from_arrays`"""
+        self.compact()
+        arrays = {}
+        for (dim, target), codes in self.pairs.items():
+            arrays[f"pairs.{dim}.{target}"] = codes
+        for target, codes in self.day_pairs.items():
+            arrays[f"day_pairs.{target}"] = codes
+        for dim, counts in self.row_counts.items():
+            arrays[f"row_counts.{dim}.index"] = counts.index.to_numpy()
+            arrays[f"row_counts.{dim}.counts"] = counts.to_numpy()
+        for (dim, target), sketch in self.sketches.items():
+            arrays[f"sketches.{dim}.{target}.slots"], arrays[f"sketches.{dim}.{target}.ranks"] = sketch.entries()
+        for dim, values in self.values.items():
+            arrays[f"values.{dim}"] = values
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays, precision, rows, extent):
+        """Résumé reconstitué depuis `arrays` ; KeyError si une table configurée y manque"""
+        summary = cls(precision)
+        summary.rows = rows
+        summary.extent = None if extent is None else tuple(extent)
+        for dim, target in DISTINCT_PAIRS:
+            summary.pairs[dim, target] = arrays[f"pairs.{dim}.{target}"]
+        for target in PERIOD_TARGETS:
+            summary.day_pairs[target] = arrays[f"day_pairs.{target}"]
+        for dim in ROW_COUNTS:
+            index = pd.Index(arrays[f"row_counts.{dim}.index"])
+            summary.row_counts[dim] = pd.Series(arrays[f"row_counts.{dim}.counts"], index=index, dtype='int64')
+        for dim, target in SKETCHES:
+            summary.sketches[dim, target] = sketches.DistinctSketches.from_entries(
+                precision, arrays[f"sketches.{dim}.{target}.slots"], arrays[f"sketches.{dim}.{target}.ranks"])
+        for dim in VALUE_DIMS:
+            summary.values[dim] = arrays[f"values.{dim}"]
+        return summary
+
+
+def summarize(spec, chunk_rows=CHUNK_ROWS):
+    """Lit la source décrite par `spec` par blocs ; retourne (résumé, SHA-1 du fichier, statistiques)"""
+    # Une mesure déjà en cours (banc d'essai) n'est pas interrompue
+    tracing = not tracemalloc.is_tracing()
+    if tracing:
+        tracemalloc.start()
+    start = time.perf_counter()
+    summary = StreamSummary()
+    chunks = 0
+    try:
+        with open(spec["path"], "rb") as f:
+            reader = _HashingReader(f)
+            for chunk in pd.read_csv(reader, sep=spec["sep"], header=spec["header"],
+                                     names=spec["names"], chunksize=chunk_rows):
+                summary.add(chunk)
+                chunks += 1
+        summary.compact()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        if tracing:
+            tracemalloc.stop()
+
+    stats = {
+        "origin": "stream",
+        "rows": summary.rows,
+        "bytes": summary.nbytes,
+        "peak_bytes": peak,
+        "chunks": chunks,
+        "chunk_rows": chunk_rows,
+        "seconds": time.perf_counter() - start,
+    }
+    return summary, reader.digest.hexdigest(), stats
+
+
+def _install(name, entry):
+    """Publie le résumé de `name` : version et dimensions dans datastore, tables dans aggregates"""
+    summary = entry["summary"]
+    summary.compact()
+    version = datastore._chain_version(entry["sha1"], entry["ingested"])
+    entry["stats"].update(rows=summary.rows, bytes=summary.nbytes, ingested=len(entry["ingested"]))
+    values = {dim: values.tolist() for dim, values in summary.values.items()}
+    datastore.register_summary(name, version, summary.extent, values, dict(entry["stats"]), entry["ingested"])
+    aggregates.install(name, version, summary.tables())
+    return version
+
+
+def _summary_paths(name):
+    return (
+        os.path.join(datastore.CACHE_DIR, f"{name}.summary.npz"),
+        os.path.join(datastore.CACHE_DIR, f"{name}.summary.json"),
+    )
+
+
+def _write_summary_meta(name, entry):
+    _, meta_path = _summary_paths(name)
+    summary = entry["summary"]
+    mtime_ns, size = entry["fingerprint"]
+    with open(meta_path + ".tmp", "w") as f:
+        json.dump({
+            "mtime_ns": mtime_ns, "size": size, "sha1": entry["sha1"],
+            "version": datastore._chain_version(entry["sha1"], entry["ingested"]),
+            "precision": summary.precision, "rows": summary.rows, "extent": summary.extent,
+            "ingested": entry["ingested"], "stats": entry["stats"],
+        }, f)
+    os.replace(meta_path + ".tmp", meta_path)
+
+
+def _save(name, entry):
+    """Enregistre le résumé et ses extraits ajoutés à côté du cache Feather (écriture atomique)
+
+    Les extraits ingérés sont déjà rangés dans `ingest.PROCESSED_DIR` : sans cette copie, un
+    redémarrage ne retrouverait que le CSV de base.
+    """
+    data_path, _ = _summary_paths(name)
+    version = datastore._chain_version(entry["sha1"], entry["ingested"])
+    try:
+        os.makedirs(datastore.CACHE_DIR, exist_ok=True)
+        with open(data_path + ".tmp", "wb") as f:
+            np.savez(f, version=np.array(version), **entry["summary"].arrays())
+        os.replace(data_path + ".tmp", data_path)
+        _write_summary_meta(name, entry)
+    except OSError:
+        # Répertoire en lecture seule : le résumé sera refait au prochain démarrage
+        pass
+
+
+def _restore(name):
+    """Résumé enregistré de `name` s'il porte sur le CSV actuel, sinon None"""
+    start = time.perf_counter()
+    data_path, meta_path = _summary_paths(name)
+    try:
+        with open(meta_path) as f:
+            meta = json.load(f)
+        mtime_ns, size, sha1 = datastore._source_fingerprint(datastore.SOURCES[name], meta)
+        if sha1 != meta["sha1"]:
+            return None
+        with np.load(data_path) as arrays:
+            # Métadonnées et tableaux d'écritures différentes : on refait le résumé
+            if str(arrays["version"]) != meta["version"]:
+                return None
+            summary = StreamSummary.from_arrays(arrays, meta["precision"], meta["rows"], meta["extent"])
+    except (OSError, ValueError, KeyError):
+        return None
+    stats = dict(meta["stats"], origin="stream (cache)", seconds=time.perf_counter() - start)
+    entry = {"summary": summary, "sha1": sha1, "fingerprint": (mtime_ns, size),
+             "ingested": meta["ingested"], "stats": stats}
+    if mtime_ns != meta["mtime_ns"]:
+        # Fichier touché sans changement de contenu : on rafraîchit les métadonnées
+        try:
+            _write_summary_meta(name, entry)
+        except OSError:
+            pass
+    return entry
+
+
+def refresh(name):
+    """Oublie le résumé de `name` si celui enregistré porte des extraits ajoutés par un autre processus
+
+    Retourne True dans ce cas ; le prochain `load` reprend le résumé enregistré.
+    """
+    entry = _summaries.get(name)
+    if entry is None:
+        return False
+    _, meta_path = _summary_paths(name)
+    try:
+        with open(meta_path) as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return False
+    if meta.get("sha1") != entry["sha1"] or not datastore.extends(meta.get("ingested", []), entry["ingested"]):
+        return False
+    with _lock:
+        if _summaries.get(name) is entry:
+            del _summaries[name]
+    datastore.forget(name)
+    return True
+
+
+def load(name, chunk_rows=CHUNK_ROWS):
+    """Résume la source `name` au premier appel et publie ses tables ; retourne le résumé
+
+    Le résumé enregistré par un processus précédent est repris s'il porte sur le même CSV,
+    avec les extraits ajoutés depuis.
+    """
+    entry = _summaries.get(name)
+    # datastore.clear() oublie la source publiée : le résumé est alors republié sans relecture
+    if entry is None or name not in datastore._streamed:
+        with _lock:
+            entry = _summaries.get(name)
+            if entry is None:
+                entry = _restore(name)
+            if entry is None:
+                spec = datastore.SOURCES[name]
+                stat = os.stat(spec["path"])
+                summary, sha1, stats = summarize(spec, chunk_rows)
+                entry = {"summary": summary, "sha1": sha1, "fingerprint": (stat.st_mtime_ns, stat.st_size),
+                         "ingested": [], "stats": stats}
+                _save(name, entry)
+            _summaries[name] = entry
+            if name not in datastore._streamed:
+                _install(name, entry)
+    return entry["summary"]
+
+
+def append_rows(name, rows, label, sha1):
+    """Réduit un extrait dans le résumé de `name` ; retourne (ancienne, nouvelle) version
+
+    Pendant de `datastore.append_rows` pour les sources résumées par blocs.
+    """
+    load(name)
+    with _lock:
+        entry = _summaries[name]
+        old_version = datastore.dataset_version(name)
+        entry["summary"].add(rows)
+        entry["ingested"].append([label, sha1])
+        version = _install(name, entry)
+        _save(name, entry)
+    return old_version, version
+
+
+def clear():
+    """Oublie les résumés en mémoire : le prochain `load` reprend le résumé enregistré ou relit la source"""
+    with _lock:
+        _summaries.clear()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Résumé par blocs d'un export de points de vente")
+    parser.add_argument("path", nargs="?", default=datastore.SOURCES["pdv"]["path"])
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    args = parser.parse_args()
+
+    summary, sha1, stats = summarize(dict(datastore.SOURCES["pdv"], path=args.path), args.chunk_rows)
+    print(f"{stats['rows']:,} lignes en {stats['chunks']} blocs, {stats['seconds']:.1f} s")
+    print(f"pic mémoire {stats['peak_bytes'] / 1e6:.1f} Mo, résumé {stats['bytes'] / 1e6:.1f} Mo")
+    for (dim, target), codes in summary.pairs.items():
+        print(f"{dim} x {target} : {len(codes):,} paires distinctes")
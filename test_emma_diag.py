@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+
+import emma_diag
+
+
+def _ratio_accords_iterrows(subset_cat, top=30):
+    """Ancien calcul ligne par ligne de render_ratio_accords_produits (référence)"""
+    acc_per_fab = subset_cat.groupby('fabID')['prodID'].count().rename('nb_accords')
+    prods_per_fab = subset_cat.groupby('fabID')['prodID'].nunique().rename('nb_produits')
+
+    ratio_df = pd.concat([acc_per_fab, prods_per_fab], axis=1).fillna(0)
+    ratio_df['ratio'] = ratio_df.apply(
+        lambda r: r['nb_accords'] / r['nb_produits'] if r['nb_produits'] > 0 else 0,
+        axis=1
+    )
+    ratio_df = ratio_df.sort_values('ratio', ascending=False).head(top).reset_index()
+    data = [
+        [
+            row['ratio'],
+            idx,
+            row['nb_accords'],
+            str(row['fabID']),
+            row['nb_accords'],
+            row['nb_produits']
+        ]
+        for idx, row in ratio_df.iterrows()
+    ]
+    return ratio_df, data
+
+
+def _subset(n_rows=5000, n_fabs=200, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'dateID': np.full(n_rows, 20220101, dtype='int32'),
+        'prodID': rng.integers(0, 800, n_rows).astype('int32'),
+        'catID': np.zeros(n_rows, dtype='int8'),
+        'fabID': rng.integers(0, n_fabs, n_rows).astype('int16'),
+        'magID': rng.integers(0, 100, n_rows).astype('int16'),
+    })
+
+
+def test_compute_ratio_accords_matches_apply():
+    subset = _subset()
+    expected, _ = _ratio_accords_iterrows(subset)
+    pd.testing.assert_frame_equal(emma_diag.compute_ratio_accords(subset), expected)
+
+
+def test_ratio_scatter_data_matches_iterrows():
+    subset = _subset(seed=1)
+    _, expected = _ratio_accords_iterrows(subset)
+    ratio_df = emma_diag.compute_ratio_accords(subset)
+    data = emma_diag.ratio_scatter_data(ratio_df, ratio_df['fabID'].astype(str).tolist())
+
+    assert len(data) == len(expected)
+    for point, old in zip(data, expected):
+        # iterrows convertissait chaque ligne en float : libellé '30.0' au lieu de '30'
+        assert point[3] == str(int(float(old[3])))
+        assert [point[i] for i in (0, 1, 2, 4, 5)] == [old[i] for i in (0, 1, 2, 4, 5)]
+
+
+def test_compute_ratio_accords_empty():
+    ratio_df = emma_diag.compute_ratio_accords(_subset().iloc[:0])
+    assert ratio_df.empty